@@ -13,9 +13,30 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import json
+import os
+
+from explicaciones import Explicaciones
+from particiones import (
+    cargar_manifiesto,
+    instituciones,
+    leer_particiones,
+    leer_top_n,
+    metricas_manifiesto,
+    seleccionar_particiones,
+)
+from puntuacion import BINS_NIVEL, UMBRALES_REGLAS
+from similares import IndiceSimilares, tabla_similares
+from simulador import SimuladorUmbrales, comparar_instituciones
 
 CSV_URL = "https://www.dropbox.com/scl/fi/v7y2qfi7yee97i15fp78j/resultados_anticorrupcion.csv?rlkey=je634a217ga8a5psh4j2ulyum&st=liqyz188&dl=1"
 
+# Si existe este directorio (ver particiones.py) se lee el dataset particionado
+# local y sólo se cargan las particiones de la institución seleccionada.
+DIR_PARTICIONES = os.environ.get("PATRIMONIA_PARTICIONES", "resultados_particionados")
+
+# Contribuciones precalculadas de riesgo_modelo (ver explicaciones.py)
+RUTA_EXPLICACIONES = os.environ.get("PATRIMONIA_EXPLICACIONES", "explicaciones_riesgo.npz")
+
 # ============================================
 # CONFIGURACIÓN DE LA PÁGINA
 # ============================================
@@ -74,16 +95,8 @@ st.markdown(
 
 
 
-@st.cache_data
-def cargar_datos():
-    """
-    Carga los resultados del análisis y metadatos desde la URL pública de Dropbox.
-    Cualquiera que entre a la app usará este mismo CSV.
-    """
-    # 1) Leer CSV grande desde la URL pública
-    df = pd.read_csv(CSV_URL)
-
-    # Convertir columnas numéricas importantes
+def convertir_numericas(df):
+    """Convierte a numérico las columnas importantes (en sitio)."""
     num_cols = [
         "total_ingresos",
         "ingreso_cargo",
@@ -108,15 +121,110 @@ def cargar_datos():
     for col in num_cols:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
 
-    # 2) Cargar metadatos (este sí va dentro del repo)
+def cargar_metadatos():
+    """Metadatos del análisis (este sí va dentro del repo)."""
     try:
         with open("metadatos_analisis.json", "r", encoding="utf-8") as f:
-            metadatos = json.load(f)
+            return json.load(f)
     except FileNotFoundError:
-        metadatos = {}
+        return {}
+
+
+@st.cache_data
+def cargar_datos():
+    """
+    Carga los resultados del análisis y metadatos desde la URL pública de Dropbox.
+    Cualquiera que entre a la app usará este mismo CSV.
+    """
+    # 1) Leer CSV grande desde la URL pública
+    df = convertir_numericas(pd.read_csv(CSV_URL))
+
+    # 2) Cargar metadatos
+    return df, cargar_metadatos()
+
+
+@st.cache_data
+def cargar_manifiesto_particiones():
+    """Manifiesto del dataset particionado local, o None si no existe."""
+    return cargar_manifiesto(DIR_PARTICIONES)
+
+
+@st.cache_data(max_entries=8)
+def cargar_datos_particionados(institucion=None):
+    """
+    Lee sólo las particiones que pueden contener la institución elegida
+    (todas si institucion es None).
+    """
+    manifiesto = cargar_manifiesto_particiones()
+    seleccion = seleccionar_particiones(manifiesto, institucion=institucion)
+    df = leer_particiones(DIR_PARTICIONES, seleccion, institucion=institucion)
+    return convertir_numericas(df)
+
+
+@st.cache_data(max_entries=64)
+def cargar_top_particionado(n, score_col, institucion, niveles, rango_ingresos):
+    """
+    Top N para la pestaña Top Riesgos con los mismos filtros del sidebar,
+    leyendo sólo las primeras filas de las particiones candidatas.
+    """
+
+    def filtro(parte):
+        mask = pd.Series(True, index=parte.index)
+        if "riesgo_nivel" in parte.columns:
+            mask &= parte["riesgo_nivel"].isin(niveles)
+        if rango_ingresos is not None and "total_ingresos" in parte.columns:
+            ingresos = pd.to_numeric(parte["total_ingresos"], errors="coerce")
+            mask &= (ingresos >= rango_ingresos[0]) & (ingresos <= rango_ingresos[1])
+        return mask
+
+    df = leer_top_n(
+        DIR_PARTICIONES,
+        cargar_manifiesto_particiones(),
+        n,
+        score_col,
+        institucion=institucion,
+        filtro=filtro,
+    )
+    return convertir_numericas(df)
+
+
+@st.cache_resource
+def cargar_explicaciones():
+    """Explicaciones precalculadas de riesgo_modelo, o None si no existen."""
+    try:
+        return Explicaciones.cargar(RUTA_EXPLICACIONES)
+    except FileNotFoundError:
+        return None
+
+
+def cargar_dataset_completo(fuente):
+    """Todas las declaraciones de la fuente ("csv" o "particiones"), sin filtrar."""
+    if fuente == "particiones":
+        return cargar_datos_particionados(None)
+    return cargar_datos()[0]
+
+
+@st.cache_resource(max_entries=2)
+def crear_simulador(fuente):
+    """
+    Simulador de umbrales sobre el dataset completo de la fuente, para que
+    P90/P99 y los conteos "Actual" coincidan con las banderas guardadas.
+    Con particiones se leen los arreglos guardados junto al manifiesto.
+    """
+    manifiesto = cargar_manifiesto_particiones() if fuente == "particiones" else None
+    if manifiesto is not None and manifiesto.get("simulador"):
+        return SimuladorUmbrales.cargar(os.path.join(DIR_PARTICIONES, manifiesto["simulador"]))
+    return SimuladorUmbrales(cargar_dataset_completo(fuente))
+
+
+@st.cache_resource(max_entries=8)
+def crear_indice_similares(_df, clave_datos):
+    """Índice KD-tree de declaraciones similares (clave_datos identifica _df)."""
+    return IndiceSimilares(_df)
 
-    return df, metadatos
 
 def calcular_metricas(df):
     """Cálculo de métricas globales."""
@@ -403,13 +511,6 @@ def generar_grafico_dependencias(df):
     return fig
 
 
-# ============================================
-# CARGA DE DATOS
-# ============================================
-
-df, metadatos = cargar_datos()
-metricas = calcular_metricas(df)
-
 # ============================================
 # HEADER
 # ============================================
@@ -434,6 +535,42 @@ riesgo_filter = st.sidebar.multiselect(
     default=niveles_default,
 )
 
+# ============================================
+# CARGA DE DATOS
+# ============================================
+
+manifiesto = cargar_manifiesto_particiones()
+institucion_filter = None
+fuente_datos = "csv" if manifiesto is None else "particiones"
+# Identifica el df cargado: el CSV completo o las particiones de una institución
+clave_datos = (fuente_datos,)
+
+if manifiesto is not None:
+    # Dataset particionado: el filtro de institución decide qué se lee
+    institucion_filter = st.sidebar.selectbox(
+        "Institución",
+        options=["Todas"] + instituciones(manifiesto),
+    )
+    df = cargar_datos_particionados(
+        None if institucion_filter == "Todas" else institucion_filter
+    )
+    clave_datos = (fuente_datos, institucion_filter)
+    metadatos = cargar_metadatos()
+    metricas = metricas_manifiesto(manifiesto)
+else:
+    df, metadatos = cargar_datos()
+    metricas = calcular_metricas(df)
+
+    # Filtro de institución
+    if "institucion" in df.columns:
+        instituciones_df = ["Todas"] + sorted(
+            df["institucion"].dropna().unique().tolist()
+        )
+        institucion_filter = st.sidebar.selectbox(
+            "Institución",
+            options=instituciones_df,
+        )
+
 # Filtro de rango de ingresos (usando percentiles para evitar outliers locos)
 rango_ingresos = None
 if "total_ingresos" in df.columns:
@@ -455,17 +592,6 @@ if "total_ingresos" in df.columns:
         format="$%d",
     )
 
-# Filtro de institución
-institucion_filter = None
-if "institucion" in df.columns:
-    instituciones = ["Todas"] + sorted(
-        df["institucion"].dropna().unique().tolist()
-    )
-    institucion_filter = st.sidebar.selectbox(
-        "Institución",
-        options=instituciones,
-    )
-
 # Aplicar filtros
 df_filtered = df.copy()
 
@@ -554,12 +680,13 @@ st.markdown("---")
 
 st.markdown("## 📊 Análisis Visual")
 
-tab1, tab2, tab3, tab4 = st.tabs(
+tab1, tab2, tab3, tab4, tab5 = st.tabs(
     [
         "📊 Distribución General",
         "🎯 Análisis de Reglas",
         "🏛️ Por Dependencia",
         "🔝 Top Riesgos",
+        "🧪 Simulador de Umbrales",
     ]
 )
 
@@ -693,7 +820,19 @@ with tab4:
         "Número de casos a mostrar", min_value=10, max_value=50, value=20, step=5
     )
 
-    top_tabla = generar_tabla_top_riesgo(df_filtered, n=num_casos)
+    score_top = columna_score_total(df_filtered)
+    if manifiesto is not None and score_top is not None:
+        # Sólo se leen las primeras filas (ordenadas por score) de cada partición
+        fuente_top = cargar_top_particionado(
+            num_casos,
+            score_top,
+            None if institucion_filter == "Todas" else institucion_filter,
+            tuple(riesgo_filter),
+            None if rango_ingresos is None else tuple(rango_ingresos),
+        )
+    else:
+        fuente_top = df_filtered
+    top_tabla = generar_tabla_top_riesgo(fuente_top, n=num_casos)
     st.dataframe(top_tabla, use_container_width=True, hide_index=True)
 
     # Opción de descarga
@@ -706,6 +845,138 @@ with tab4:
             mime="text/csv",
         )
 
+with tab5:
+    st.markdown("### 🧪 Simulador de Umbrales (qué pasaría si…)")
+    st.caption(
+        "Re-evalúa las reglas R1–R10 y los niveles de riesgo sobre todas las "
+        "declaraciones (sin filtro de institución). El modelo no se re-entrena: los niveles usan el "
+        "riesgo_modelo ya calculado."
+    )
+
+    u = UMBRALES_REGLAS
+    s1, s2, s3 = st.columns(3)
+
+    with s1:
+        st.markdown("**Otros ingresos (R1 / R3)**")
+        prop_moderada = st.slider(
+            "R1: proporción moderada",
+            min_value=0.0,
+            max_value=1.0,
+            value=(u["prop_moderada_min"], u["prop_moderada_max"]),
+            step=0.01,
+        )
+        prop_alta = st.slider(
+            "R3: proporción alta", 0.0, 1.0, u["prop_alta"], step=0.01
+        )
+
+    with s2:
+        st.markdown("**Ingresos y patrimonio (R4 / R8 / R9 / R10)**")
+        percentil_alto = st.slider(
+            "R4: percentil de ingreso alto",
+            0.50,
+            0.999,
+            u["percentil_alto_ingreso"],
+            step=0.005,
+        )
+        percentil_outlier = st.slider(
+            "R9: percentil de outlier", 0.50, 0.999, u["percentil_outlier"], step=0.001
+        )
+        patrimonio_alto = st.number_input(
+            "R8: patrimonio alto (MXN)",
+            min_value=0,
+            value=u["patrimonio_alto"],
+            step=10000,
+        )
+        ratio_deuda = st.slider(
+            "R10: deuda / patrimonio", 0.5, 10.0, float(u["ratio_deuda"]), step=0.5
+        )
+
+    with s3:
+        st.markdown("**Niveles de riesgo (riesgo_modelo)**")
+        cortes = st.slider(
+            "Cortes Medio / Alto",
+            min_value=0,
+            max_value=100,
+            value=(BINS_NIVEL[1], BINS_NIVEL[2]),
+        )
+
+    simulador = crear_simulador(fuente_datos)
+    base = simulador.simular()
+    nuevo = simulador.simular(
+        {
+            "prop_moderada_min": prop_moderada[0],
+            "prop_moderada_max": prop_moderada[1],
+            "prop_alta": prop_alta,
+            "percentil_alto_ingreso": percentil_alto,
+            "percentil_outlier": percentil_outlier,
+            "patrimonio_alto": patrimonio_alto,
+            "ratio_deuda": ratio_deuda,
+        },
+        corte_medio=cortes[0],
+        corte_alto=cortes[1],
+    )
+
+    m1, m2, m3 = st.columns(3)
+    for columna, nivel in zip([m1, m2, m3], ["Alto", "Medio", "Bajo"]):
+        with columna:
+            st.metric(
+                f"Riesgo {nivel}",
+                f"{nuevo['niveles'][nivel]:,}",
+                delta=f"{nuevo['niveles'][nivel] - base['niveles'][nivel]:+,}",
+                delta_color="off",
+            )
+
+    col_r, col_s = st.columns(2)
+
+    with col_r:
+        reglas_sim = pd.DataFrame(
+            {
+                "Actual": base["activaciones"],
+                "Simulado": nuevo["activaciones"],
+            }
+        )
+        fig_sim = go.Figure(
+            data=[
+                go.Bar(name="Actual", y=reglas_sim.index, x=reglas_sim["Actual"], orientation="h"),
+                go.Bar(name="Simulado", y=reglas_sim.index, x=reglas_sim["Simulado"], orientation="h"),
+            ]
+        )
+        fig_sim.update_layout(
+            title="Activaciones por Regla",
+            barmode="group",
+            height=500,
+            xaxis_title="Declaraciones",
+        )
+        st.plotly_chart(fig_sim, use_container_width=True)
+
+    with col_s:
+        dist_sim = pd.DataFrame(
+            {
+                "Actual": base["distribucion_score_reglas"],
+                "Simulado": nuevo["distribucion_score_reglas"],
+            }
+        )
+        fig_dist = go.Figure(
+            data=[
+                go.Bar(name="Actual", x=dist_sim.index, y=dist_sim["Actual"]),
+                go.Bar(name="Simulado", x=dist_sim.index, y=dist_sim["Simulado"]),
+            ]
+        )
+        fig_dist.update_layout(
+            title="Distribución de score_reglas",
+            barmode="group",
+            height=500,
+            xaxis_title="Reglas activadas",
+            yaxis_title="Declaraciones",
+        )
+        st.plotly_chart(fig_dist, use_container_width=True)
+
+    st.markdown("### 🏛️ Cambios por Institución")
+    st.dataframe(
+        comparar_instituciones(base["por_institucion"], nuevo["por_institucion"]),
+        use_container_width=True,
+    )
+
 # ============================================
 # BÚSQUEDA INDIVIDUAL
 # ============================================
@@ -727,14 +998,31 @@ with col_bus2:
         "🔎 Buscar", type="primary", use_container_width=True
     )
 
-if buscar_btn and nombre_busqueda:
+# Grupo de pares para "declaraciones similares" en la ficha
+opciones_similares = {
+    "Todas": None,
+    "Mismo nivel de gobierno": "nivelGobierno",
+    "Misma institución": "institucion",
+}
+comparar_con = st.radio(
+    "Comparar declaraciones similares con",
+    options=list(opciones_similares),
+    horizontal=True,
+)
+
+# La búsqueda sigue activa en los reruns que disparan el radio y las fichas
+if buscar_btn:
+    st.session_state["busqueda_activa"] = nombre_busqueda
+busqueda_activa = st.session_state.get("busqueda_activa", "")
+
+if busqueda_activa:
     # Búsqueda en nombre completo
     mask = pd.Series(False, index=df.index)
 
     for col in ["nombre", "primerApellido", "segundoApellido"]:
         if col in df.columns:
             mask = mask | df[col].str.contains(
-                nombre_busqueda, case=False, na=False
+                busqueda_activa, case=False, na=False
             )
 
     resultados = df[mask]
@@ -747,6 +1035,8 @@ if buscar_btn and nombre_busqueda:
             reglas_explicacion = {}
 
         score_col = columna_score_total(df)
+        explicaciones = cargar_explicaciones()
+        indice_similares = None  # se construye al abrir la primera ficha con similares
 
         for _, row in resultados.iterrows():
             score_text = (
@@ -810,6 +1100,17 @@ if buscar_btn and nombre_busqueda:
                             f"**Score Modelo:** {row['riesgo_modelo']:.3f}"
                         )
 
+                    # Features que más pesaron en riesgo_modelo
+                    factores = (
+                        explicaciones.de(row.get("id"))
+                        if explicaciones is not None
+                        else []
+                    )
+                    if factores:
+                        st.markdown("**Factores del Score Modelo:**")
+                        for feature, peso in factores:
+                            st.write(f"- {feature}: {peso*100:.0f}%")
+
                 # Reglas activadas
                 reglas_activas = [
                     c for c in row.index if c.startswith("R") and row[c] == 1
@@ -821,6 +1122,24 @@ if buscar_btn and nombre_busqueda:
                         st.warning(
                             f"- {regla}: {desc}" if desc else f"- {regla}"
                         )
+
+                # Declaraciones con perfil de ingresos / patrimonio parecido
+                # (sólo bajo demanda: una búsqueda puede regresar miles de fichas)
+                if st.toggle("👥 Ver declaraciones similares", key=f"similares_{row.name}"):
+                    if indice_similares is None:
+                        indice_similares = crear_indice_similares(df, clave_datos)
+                    posicion = df.index.get_loc(row.name)
+                    st.dataframe(
+                        tabla_similares(
+                            df,
+                            indice_similares,
+                            posicion,
+                            k=5,
+                            restringir=opciones_similares[comparar_con],
+                        ),
+                        use_container_width=True,
+                        hide_index=True,
+                    )
     else:
         st.warning("⚠️ No se encontraron resultados")
 
@@ -856,6 +1175,15 @@ with st.expander("ℹ️ Información del Análisis"):
             f"{metadatos.get('cobertura_patrimonial', 0)*100:.1f}%"
         )
 
+    # Manifiesto de la ejecución (pipeline.py)
+    if "ejecucion" in metadatos:
+        st.markdown("**Costo por Etapa del Pipeline**")
+        st.dataframe(
+            pd.DataFrame(metadatos["ejecucion"].get("etapas", [])),
+            use_container_width=True,
+            hide_index=True,
+        )
+
 st.markdown("---")
 st.markdown(
     """
@@ -0,0 +1,403 @@
+"""
+BENCHMARK - Carga concurrente sobre el Dashboard
+Levanta Dashboard.py con `streamlit run` sobre un dataset particionado
+sintético local (no se toca el CSV de Dropbox) y lo maneja con N clientes
+headless por websocket, como N analistas con el dashboard abierto. Por
+nivel de concurrencia reporta:
+
+- latencia de rerun p50 / p95 (cada interacción de un guion es un rerun,
+  medido desde que se envía el cambio hasta script_finished)
+- reruns por segundo del servidor
+- RSS del servidor y RSS incremental por sesión conectada (incluye lo que
+  crezcan los cachés compartidos durante el nivel, así que es una cota
+  superior)
+- el punto de saturación: la concurrencia a partir de la cual los reruns/s
+  dejan de crecer (menos de --umbral-saturacion de mejora)
+
+Cada nivel usa un servidor nuevo, calentado con una sesión que recorre los
+guiones y todas las instituciones, para que lo medido sea el costo de los
+reruns y no la primera lectura de las particiones, y para que el RSS por
+sesión no herede memoria de niveles anteriores.
+
+Se usa un cliente headless y no AppTest porque AppTest no es seguro entre
+hilos (cambia el Runtime global en cada corrida) y no comparte un servidor.
+Cambiar de pestaña no dispara un rerun en Streamlit (todas las pestañas se
+ejecutan en cada corrida), así que el guion de "pestañas" mueve los
+controles que viven dentro de ellas (Top N y el simulador de umbrales).
+
+Los nombres sintéticos se repiten mucho; para que una búsqueda regrese unas
+cuantas fichas, como con el dataset real, el segundoApellido del dataset de
+carga es casi único.
+
+Requiere `websockets` >= 11 (cliente síncrono), que no está en
+requirements.txt porque sólo lo usa este benchmark. Las versiones recientes
+de Streamlit ya lo instalan; si no: pip install "websockets>=11".
+
+Para ejecutar (desde la raíz del repositorio):
+python -m benchmarks.bench_dashboard --filas 200000 --sesiones 1 2 4 8 16
+"""
+
+import argparse
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+from datos_sinteticos import INSTITUCIONES, generar_filas
+from explicaciones import calcular_explicaciones, guardar_explicaciones
+from particiones import cargar_manifiesto, exportar_particionado
+from puntuacion import ModeloRiesgo
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_DASHBOARD = os.path.join(RAIZ, "Dashboard.py")
+
+FILAS_POR_APELLIDO = 4
+
+WIDGETS = {"button", "checkbox", "multiselect", "radio", "selectbox", "slider", "text_input"}
+
+
+# ============================================
+# DATASET SINTÉTICO
+# ============================================
+
+
+def preparar_dataset(directorio, filas, semilla=42):
+    """
+    Dataset particionado + explicaciones en `directorio` (se reutiliza si ya
+    existe con el mismo número de filas). Regresa (dir_particiones,
+    ruta_explicaciones, apellidos de ejemplo para las búsquedas).
+    """
+    dir_particiones = os.path.join(directorio, "particiones")
+    ruta_explicaciones = os.path.join(directorio, "explicaciones.npz")
+
+    rng = np.random.default_rng(semilla)
+    num_apellidos = max(1, filas // FILAS_POR_APELLIDO)
+    apellidos = [f"S{i:07d}" for i in rng.choice(num_apellidos, min(50, num_apellidos), replace=False)]
+
+    manifiesto = cargar_manifiesto(dir_particiones)
+    if manifiesto is not None and manifiesto["total_filas"] == filas and os.path.exists(ruta_explicaciones):
+        return dir_particiones, ruta_explicaciones, apellidos
+
+    df = generar_filas(filas, semilla)
+    df["segundoApellido"] = [f"S{i:07d}" for i in rng.integers(0, num_apellidos, filas)]
+
+    modelo = ModeloRiesgo.entrenar(df)
+    data = modelo.puntuar(df)
+    exportar_particionado(data, dir_particiones)
+
+    indices, pesos = calcular_explicaciones(modelo, data)
+    guardar_explicaciones(ruta_explicaciones, data["id"], indices, pesos)
+    return dir_particiones, ruta_explicaciones, apellidos
+
+
+# ============================================
+# SERVIDOR LOCAL
+# ============================================
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_proceso_mb(pid):
+    """VmRSS de otro proceso en MB (Linux); NaN si no se puede leer."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+@contextlib.contextmanager
+def servidor_local(dir_particiones, ruta_explicaciones, espera=60):
+    """`streamlit run Dashboard.py` en un puerto libre; regresa (url, pid)."""
+    puerto = _puerto_libre()
+    env = dict(
+        os.environ,
+        PATRIMONIA_PARTICIONES=os.path.abspath(dir_particiones),
+        PATRIMONIA_EXPLICACIONES=os.path.abspath(ruta_explicaciones),
+    )
+    proceso = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", RUTA_DASHBOARD,
+            "--server.headless", "true",
+            "--server.port", str(puerto),
+            "--server.address", "127.0.0.1",
+            "--server.enableXsrfProtection", "false",
+            "--browser.gatherUsageStats", "false",
+            "--logger.level", "error",
+        ],
+        cwd=RAIZ,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        limite = time.perf_counter() + espera
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{puerto}/_stcore/health").read()
+                break
+            except OSError:
+                if proceso.poll() is not None or time.perf_counter() > limite:
+                    raise RuntimeError("No arrancó el servidor de Streamlit")
+                time.sleep(0.2)
+        yield f"ws://127.0.0.1:{puerto}/_stcore/stream", proceso.pid
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+# ============================================
+# CLIENTE HEADLESS
+# ============================================
+
+
+def estado_widget(tipo, widget, valor):
+    """WidgetState con el formato que manda el navegador para cada widget."""
+    ws = WidgetState(id=widget.id)
+    if tipo == "button":
+        ws.trigger_value = True
+    elif tipo == "checkbox":
+        ws.bool_value = valor
+    elif tipo == "slider":
+        ws.double_array_value.data[:] = valor if isinstance(valor, (list, tuple)) else [valor]
+    elif tipo == "multiselect":
+        ws.string_array_value.data[:] = valor
+    else:
+        ws.string_value = valor
+    return ws
+
+
+class SesionHeadless:
+    """Una pestaña del navegador: un websocket con su propia sesión de Streamlit."""
+
+    def __init__(self, url, timeout):
+        self._pila = contextlib.ExitStack()
+        self.ws = self._pila.enter_context(
+            connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=timeout)
+        )
+        self.timeout = timeout
+        self.widgets = {}
+        self.latencias = []
+        self.errores = 0
+
+    def rerun(self, estados=()):
+        """
+        Envía los widgets cambiados, espera script_finished y actualiza
+        self.widgets. Los widgets no enviados conservan su valor en el
+        servidor, igual que con el navegador.
+        """
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(estados)
+
+        inicio = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        widgets = {}
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(self.ws.recv(timeout=self.timeout))
+            tipo_msg = fwd.WhichOneof("type")
+            if tipo_msg == "script_finished":
+                break
+            if tipo_msg == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                elemento = fwd.delta.new_element
+                tipo = elemento.WhichOneof("type")
+                if tipo in WIDGETS:
+                    widget = getattr(elemento, tipo)
+                    widgets[(tipo, widget.label)] = widget
+                elif tipo == "exception":
+                    self.errores += 1
+        self.latencias.append(time.perf_counter() - inicio)
+        self.widgets = widgets
+        return self
+
+    def cambiar(self, tipo, etiqueta, valor=None):
+        """Cambia un widget (o presiona un botón) y hace el rerun."""
+        widget = self.widgets.get((tipo, etiqueta))
+        if widget is None:
+            raise LookupError(f"No se encontró {tipo} '{etiqueta}'")
+        return self.rerun([estado_widget(tipo, widget, valor)])
+
+    def cerrar(self):
+        self._pila.close()
+
+
+# ============================================
+# GUIONES DE INTERACCIÓN
+# ============================================
+
+
+def _guion_filtros(sesion, rng, apellidos):
+    """Nivel de riesgo, institución y rango de ingresos en el sidebar."""
+    sesion.cambiar("multiselect", "Nivel de Riesgo", ["Alto", "Medio"])
+    sesion.cambiar("selectbox", "Institución", str(rng.choice(INSTITUCIONES)))
+    ingresos = sesion.widgets[("slider", "Rango de Ingresos (MXN)")]
+    margen = (ingresos.max - ingresos.min) * 0.25
+    sesion.cambiar("slider", "Rango de Ingresos (MXN)", [ingresos.min + margen, ingresos.max - margen])
+    sesion.cambiar("selectbox", "Institución", "Todas")
+    sesion.cambiar("multiselect", "Nivel de Riesgo", ["Alto", "Medio", "Bajo"])
+
+
+def _guion_pestanas(sesion, rng, apellidos):
+    """Controles dentro de las pestañas: Top N y simulador de umbrales."""
+    sesion.cambiar("slider", "Número de casos a mostrar", int(rng.choice([30, 40, 50])))
+    sesion.cambiar("slider", "R3: proporción alta", round(float(rng.uniform(0.3, 0.7)), 2))
+    sesion.cambiar("slider", "Cortes Medio / Alto", [40, 75])
+    sesion.cambiar("slider", "R10: deuda / patrimonio", 5.0)
+    sesion.cambiar("slider", "Número de casos a mostrar", 20)
+
+
+def _guion_busqueda(sesion, rng, apellidos):
+    """Búsqueda por apellido y una ficha con declaraciones similares."""
+    sesion.cambiar("text_input", "Buscar por nombre o apellido", str(rng.choice(apellidos)))
+    sesion.cambiar("button", "🔎 Buscar")
+    # La búsqueda sigue activa: abrir similares y cambiar el grupo no requiere buscar otra vez
+    sesion.cambiar("checkbox", "👥 Ver declaraciones similares", True)
+    sesion.cambiar("radio", "Comparar declaraciones similares con", "Misma institución")
+    sesion.cambiar("radio", "Comparar declaraciones similares con", "Todas")
+
+
+GUIONES = {
+    "filtros": _guion_filtros,
+    "pestanas": _guion_pestanas,
+    "busqueda": _guion_busqueda,
+}
+
+
+def calentar(url, apellidos, timeout):
+    """Una sesión que pasa por todos los guiones e instituciones."""
+    sesion = SesionHeadless(url, timeout).rerun()
+    rng = np.random.default_rng(0)
+    for guion in GUIONES.values():
+        guion(sesion, rng, apellidos)
+    for institucion in INSTITUCIONES:
+        sesion.cambiar("selectbox", "Institución", institucion)
+    sesion.cerrar()
+
+
+# ============================================
+# NIVELES DE CONCURRENCIA
+# ============================================
+
+
+def correr_nivel(num_sesiones, repeticiones, apellidos, dataset, timeout):
+    """
+    Servidor nuevo, caché caliente y `num_sesiones` sesiones concurrentes
+    (guiones repartidos en turno). Regresa sus métricas.
+    """
+    with servidor_local(*dataset) as (url, pid):
+        calentar(url, apellidos, timeout)
+        rss_inicio = rss_proceso_mb(pid)
+
+        nombres = list(GUIONES)
+        sesiones = [None] * num_sesiones
+        fallas = []
+
+        def cliente(i):
+            try:
+                sesion = sesiones[i] = SesionHeadless(url, timeout).rerun()
+                rng = np.random.default_rng(i)
+                for _ in range(repeticiones):
+                    GUIONES[nombres[i % len(nombres)]](sesion, rng, apellidos)
+            except Exception as e:  # cuenta como error de la sesión
+                fallas.append(e)
+
+        hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(num_sesiones)]
+        inicio = time.perf_counter()
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        segundos = time.perf_counter() - inicio
+
+        # Las sesiones siguen conectadas (pestañas abiertas) al medir la memoria
+        rss_fin = rss_proceso_mb(pid)
+        vivas = [s for s in sesiones if s is not None]
+        for s in vivas:
+            s.cerrar()
+
+    latencias = np.concatenate([s.latencias for s in vivas] or [[np.nan]]) * 1000
+    p50, p95 = np.percentile(latencias, [50, 95])
+    reruns = sum(len(s.latencias) for s in vivas)
+    return {
+        "sesiones": num_sesiones,
+        "reruns": reruns,
+        "reruns_s": reruns / segundos,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "rss_mb": rss_fin,
+        "rss_sesion_mb": max(0.0, rss_fin - rss_inicio) / num_sesiones,
+        "errores": sum(s.errores for s in vivas) + len(fallas),
+    }
+
+
+def punto_saturacion(resultados, umbral):
+    """
+    Concurrencia a partir de la cual agregar sesiones mejora los reruns/s en
+    menos de `umbral` (proporción). None si no se alcanzó en el barrido.
+    """
+    mejor = resultados[0]
+    for r in resultados[1:]:
+        if r["reruns_s"] < mejor["reruns_s"] * (1 + umbral):
+            return mejor["sesiones"]
+        mejor = r
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del Dashboard con sesiones concurrentes")
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--sesiones", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeticiones", type=int, default=3, help="Pasadas del guion por sesión")
+    parser.add_argument("--umbral-saturacion", type=float, default=0.10)
+    parser.add_argument("--timeout", type=float, default=300, help="Segundos máximos por rerun")
+    parser.add_argument("--directorio", default=".cache_carga_dashboard")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    dataset = preparar_dataset(args.directorio, args.filas)
+    apellidos = dataset[2]
+    print(f"Dataset sintético ({args.filas:,} filas) listo en {time.perf_counter() - inicio:.1f} s")
+
+    print(
+        f"{'sesiones':>9}{'reruns':>8}{'reruns/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'RSS MB':>9}{'MB/sesión':>11}{'errores':>9}"
+    )
+    resultados = []
+    for n in sorted(args.sesiones):
+        r = correr_nivel(n, args.repeticiones, apellidos, dataset[:2], args.timeout)
+        resultados.append(r)
+        print(
+            f"{r['sesiones']:>9}{r['reruns']:>8}{r['reruns_s']:>10.2f}{r['p50_ms']:>10.0f}"
+            f"{r['p95_ms']:>10.0f}{r['rss_mb']:>9.0f}{r['rss_sesion_mb']:>11.1f}{r['errores']:>9}"
+        )
+
+    saturacion = punto_saturacion(resultados, args.umbral_saturacion)
+    if saturacion is None:
+        print("Sin saturación en el rango probado; prueba con más sesiones.")
+    else:
+        print(
+            f"Saturación: a partir de {saturacion} sesiones los reruns/s mejoran "
+            f"menos de {args.umbral_saturacion:.0%}."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+BENCHMARK - Lector selectivo PDN S1
+Compara la lectura del notebook (json.load del archivo completo) contra los
+motores en streaming de lector_pdn: tiempo de lectura y memoria pico por
+archivo (tracemalloc), y verifica que las filas coincidan.
+
+Para ejecutar (desde la raíz del repositorio):
+python -m benchmarks.bench_lector --archivos 4 --declaraciones 5000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from datos_sinteticos import generar_declaraciones
+from lector_pdn import ijson, leer_archivos
+from puntuacion import fila_desde_declaracion
+
+
+def leer_como_notebook(rutas):
+    """Lectura original: json.load completo de cada archivo."""
+    filas, errores = [], []
+    for ruta in rutas:
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            filas.extend(fila_desde_declaracion(d) for d in data)
+        except Exception as e:
+            errores.append({"ruta": ruta, "tipo": type(e).__name__, "mensaje": str(e)})
+    return filas, errores
+
+
+def medir(nombre, funcion, rutas):
+    """Tiempo total y memoria pico por archivo (máximo sobre archivos)."""
+    inicio = time.perf_counter()
+    filas, errores = funcion(rutas)
+    segundos = time.perf_counter() - inicio
+
+    pico = 0
+    for ruta in rutas:
+        tracemalloc.start()
+        funcion([ruta])
+        pico = max(pico, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    print(f"{nombre:<12}{segundos:>10.2f}{len(filas) / segundos:>14,.0f}{pico / 2**20:>14.1f}{len(errores):>8}")
+    return pd.DataFrame(filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del lector selectivo PDN S1")
+    parser.add_argument("--archivos", type=int, default=4)
+    parser.add_argument("--declaraciones", type=int, default=5000,
+                        help="Declaraciones por archivo")
+    parser.add_argument("--relleno", type=int, default=200,
+                        help="Caracteres de relleno en secciones no usadas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = []
+        for i in range(args.archivos):
+            ruta = os.path.join(tmp, f"pdn_{i}.json")
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump(generar_declaraciones(args.declaraciones, semilla=i, relleno=args.relleno), f)
+            rutas.append(ruta)
+        tam = sum(os.path.getsize(r) for r in rutas) / 2**20
+        print(f"{args.archivos} archivos, {tam:.1f} MiB en total")
+
+        print(f"{'lector':<12}{'segundos':>10}{'filas/s':>14}{'pico MiB':>14}{'errores':>8}")
+        base = medir("json.load", leer_como_notebook, rutas)
+        motores = ["stdlib"] + (["ijson"] if ijson is not None else [])
+        for motor in motores:
+            df = medir(motor, lambda r, m=motor: leer_archivos(r, motor=m), rutas)
+            pd.testing.assert_frame_equal(df[base.columns], base, check_dtype=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+BENCHMARK - Servicio de puntuación con micro-lotes
+Levanta servicio_riesgo en un hilo con datos sintéticos y mide peticiones/s
+y filas/s con varios clientes concurrentes, con y sin micro-lotes.
+
+Para ejecutar (desde la raíz del repositorio):
+python -m benchmarks.bench_servicio --clientes 16 --filas-por-peticion 10
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+from datos_sinteticos import generar_declaraciones, generar_filas
+from puntuacion import ModeloRiesgo
+from servicio_riesgo import ServidorRiesgo
+
+
+def _cliente(url, cuerpo, fin, conteo, candado):
+    """Envía peticiones hasta el tiempo `fin` y acumula cuántas terminaron."""
+    hechas = 0
+    while time.perf_counter() < fin:
+        req = urllib.request.Request(
+            url, data=cuerpo, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(req) as r:
+            r.read()
+        hechas += 1
+    with candado:
+        conteo[0] += hechas
+
+
+def medir(modelo, clientes, cuerpo, filas_por_peticion, duracion, max_filas, espera_ms):
+    """Corre una ronda del benchmark y regresa (peticiones/s, filas/s, lotes)."""
+    servidor = ServidorRiesgo(("127.0.0.1", 0), modelo, max_filas=max_filas, espera_ms=espera_ms)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/puntuar"
+
+    conteo, candado = [0], threading.Lock()
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    hilos = [
+        threading.Thread(target=_cliente, args=(url, cuerpo, fin, conteo, candado))
+        for _ in range(clientes)
+    ]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    transcurrido = time.perf_counter() - inicio
+
+    lotes = servidor.micro_lotes.lotes
+    servidor.shutdown()
+    servidor.server_close()
+
+    rps = conteo[0] / transcurrido
+    return rps, rps * filas_por_peticion, lotes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del servicio de puntuación")
+    parser.add_argument("--filas-entrenamiento", type=int, default=50_000)
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--filas-por-peticion", type=int, default=10)
+    parser.add_argument("--duracion", type=float, default=5.0)
+    parser.add_argument("--formato", choices=["declaraciones", "filas"], default="declaraciones")
+    args = parser.parse_args()
+
+    print(f"Entrenando modelo con {args.filas_entrenamiento:,} filas sintéticas...")
+    modelo = ModeloRiesgo.entrenar(generar_filas(args.filas_entrenamiento))
+
+    if args.formato == "declaraciones":
+        cuerpo = {"declaraciones": generar_declaraciones(args.filas_por_peticion, semilla=7)}
+    else:
+        filas = generar_filas(args.filas_por_peticion, semilla=7)
+        cuerpo = {"filas": json.loads(filas.to_json(orient="records"))}
+    cuerpo = json.dumps(cuerpo).encode("utf-8")
+
+    escenarios = [
+        ("sin micro-lotes", 1, 0),
+        ("micro-lotes 2 ms", 4096, 2),
+        ("micro-lotes 5 ms", 4096, 5),
+    ]
+    print(f"{'escenario':<20}{'peticiones/s':>14}{'filas/s':>12}{'lotes':>8}")
+    for nombre, max_filas, espera_ms in escenarios:
+        rps, filas_s, lotes = medir(
+            modelo, args.clientes, cuerpo, args.filas_por_peticion,
+            args.duracion, max_filas, espera_ms,
+        )
+        print(f"{nombre:<20}{rps:>14,.1f}{filas_s:>12,.0f}{lotes:>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+BENCHMARK - Índice de declaraciones similares
+Tiempo de construcción del KD-tree y latencia por consulta (p50 / p95) sobre
+filas sintéticas, sin restricción y restringido a nivelGobierno / institucion.
+
+Para ejecutar (desde la raíz del repositorio):
+python -m benchmarks.bench_similares --filas 700000 --consultas 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from datos_sinteticos import generar_filas
+from puntuacion import construir_features
+from similares import IndiceSimilares
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice de similares")
+    parser.add_argument("--filas", type=int, default=700_000)
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    df = construir_features(generar_filas(args.filas))
+
+    inicio = time.perf_counter()
+    indice = IndiceSimilares(df)
+    print(f"Construcción del índice ({args.filas:,} filas): {time.perf_counter() - inicio:.2f} s")
+
+    rng = np.random.default_rng(0)
+    posiciones = rng.integers(0, args.filas, args.consultas)
+
+    print(f"{'restricción':<16}{'p50 ms':>10}{'p95 ms':>10}")
+    for restringir in [None, "nivelGobierno", "institucion"]:
+        # Primera pasada construye los árboles de grupo; se mide la segunda
+        for pos in posiciones[:50]:
+            indice.vecinos(pos, k=args.k, restringir=restringir)
+        tiempos = []
+        for pos in posiciones:
+            t = time.perf_counter()
+            indice.vecinos(pos, k=args.k, restringir=restringir)
+            tiempos.append((time.perf_counter() - t) * 1000)
+        p50, p95 = np.percentile(tiempos, [50, 95])
+        print(f"{str(restringir or 'ninguna'):<16}{p50:>10.3f}{p95:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
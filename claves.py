@@ -0,0 +1,24 @@
+"""
+CLAVES DE CACHÉ - PatrimonIA
+Hashes estables que usan pipeline.py (llaves de etapa) y entrenamiento.py
+(llaves de las matrices preprocesadas), sin que uno dependa del otro.
+"""
+
+import hashlib
+import json
+import os
+
+
+def calcular_clave(*partes):
+    """sha256 de una representación JSON estable de las partes."""
+    texto = json.dumps(partes, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:20]
+
+
+def huella_archivos(rutas):
+    """Huella de una lista de archivos (ruta, tamaño y fecha de modificación)."""
+    h = hashlib.sha256()
+    for ruta in rutas:
+        st = os.stat(ruta)
+        h.update(f"{ruta}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()[:20]
@@ -0,0 +1,144 @@
+"""
+DATOS SINTÉTICOS - PatrimonIA
+Generadores de declaraciones y filas de features con distribuciones
+parecidas a las de PDN S1, para benchmarks y pruebas locales sin depender
+de Google Drive ni del CSV en Dropbox.
+"""
+
+import numpy as np
+import pandas as pd
+
+INSTITUCIONES = [
+    "SECRETARÍA DE HACIENDA",
+    "SECRETARÍA DE SALUD",
+    "SECRETARÍA DE EDUCACIÓN",
+    "INSTITUTO MEXICANO DEL SEGURO SOCIAL",
+    "COMISIÓN FEDERAL DE ELECTRICIDAD",
+    "PETRÓLEOS MEXICANOS",
+    "GOBIERNO DEL ESTADO DE JALISCO",
+    "GOBIERNO DEL ESTADO DE OAXACA",
+    "MUNICIPIO DE PUEBLA",
+    "MUNICIPIO DE MONTERREY",
+]
+
+NIVELES_GOBIERNO = ["FEDERAL", "ESTATAL", "MUNICIPAL_ALCALDIA"]
+
+NOMBRES = ["JUAN", "MARÍA", "JOSÉ", "GUADALUPE", "LUIS", "ANA", "CARLOS", "SOFÍA"]
+APELLIDOS = ["PÉREZ", "GARCÍA", "LÓPEZ", "HERNÁNDEZ", "MARTÍNEZ", "RAMÍREZ", "CRUZ"]
+
+
+def _montos(rng, n, prob, media_log, sigma=1.0):
+    """Montos log-normales presentes con probabilidad prob (NaN si no)."""
+    montos = rng.lognormal(media_log, sigma, n).round(2)
+    return np.where(rng.random(n) < prob, montos, np.nan)
+
+
+def generar_filas(n, semilla=42):
+    """DataFrame con las columnas base que produce la lectura del notebook."""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame(
+        {
+            "id": [f"sint-{i:07d}" for i in range(n)],
+            "anio": rng.integers(2019, 2025, n),
+            "tipo": rng.choice(["INICIAL", "MODIFICACIÓN", "CONCLUSIÓN"], n),
+            "institucion": rng.choice(INSTITUCIONES, n),
+            "nombre": rng.choice(NOMBRES, n),
+            "primerApellido": rng.choice(APELLIDOS, n),
+            "segundoApellido": rng.choice(APELLIDOS, n),
+            "cargo": rng.choice(["ANALISTA", "DIRECTOR", "JEFE DE DEPARTAMENTO"], n),
+            "nivelGobierno": rng.choice(NIVELES_GOBIERNO, n),
+            "ente": rng.choice(INSTITUCIONES, n),
+            "ingreso_cargo": _montos(rng, n, 0.95, 12.5, 0.7),
+            "ingreso_neto": _montos(rng, n, 0.9, 12.6, 0.7),
+            "ingreso_industrial": _montos(rng, n, 0.03, 11.0),
+            "ingreso_financiero": _montos(rng, n, 0.08, 9.0),
+            "ingreso_profesional": _montos(rng, n, 0.05, 11.0),
+            "ingreso_enajenacion": _montos(rng, n, 0.01, 12.0),
+            "otros_ingresos": _montos(rng, n, 0.15, 10.5, 1.2),
+            "inmuebles_total": _montos(rng, n, 0.06, 14.0),
+            "vehiculos_total": _montos(rng, n, 0.05, 12.0),
+            "muebles_total": _montos(rng, n, 0.03, 10.5),
+            "adeudos_total": _montos(rng, n, 0.04, 12.5),
+        }
+    )
+
+
+def _monto_json(v):
+    """Objeto {'valor', 'moneda'} como en PDN S1."""
+    return {"valor": float(v), "moneda": "MXN"}
+
+
+def _lista_bienes(v, campo, relleno):
+    """Lista con un bien del declarante (y otro de un tercero) o vacía."""
+    if np.isnan(v):
+        return []
+    return [
+        {"titular": [{"clave": "DEC", "valor": "DECLARANTE"}], campo: _monto_json(v), **relleno},
+        {"titular": [{"clave": "CYG", "valor": "CÓNYUGE"}], campo: _monto_json(v / 2), **relleno},
+    ]
+
+
+def declaracion_desde_fila(fila, relleno=0):
+    """
+    Construye una declaración en formato PDN S1 a partir de una fila de
+    generar_filas. 'relleno' agrega secciones que el análisis no usa para
+    simular el tamaño real de los archivos.
+    """
+    def remu(v):
+        return {} if np.isnan(v) else {"remuneracionTotal": _monto_json(v)}
+
+    extra = {"descripcion": "x" * relleno} if relleno else {}
+    return {
+        "id": fila["id"],
+        "anioEjercicio": int(fila["anio"]),
+        "metadata": {"tipo": fila["tipo"], "institucion": fila["institucion"]},
+        "declaracion": {
+            "situacionPatrimonial": {
+                "datosGenerales": {
+                    "nombre": fila["nombre"],
+                    "primerApellido": fila["primerApellido"],
+                    "segundoApellido": fila["segundoApellido"],
+                },
+                "datosEmpleoCargoComision": {
+                    "empleoCargoComision": fila["cargo"],
+                    "nivelOrdenGobierno": fila["nivelGobierno"],
+                    "nombreEntePublico": fila["ente"],
+                },
+                "ingresos": {
+                    "remuneracionAnualCargoPublico": (
+                        {} if np.isnan(fila["ingreso_cargo"]) else _monto_json(fila["ingreso_cargo"])
+                    ),
+                    "ingresoAnualNetoDeclarante": (
+                        {} if np.isnan(fila["ingreso_neto"]) else _monto_json(fila["ingreso_neto"])
+                    ),
+                    "actividadIndustrialComercialEmpresarial": remu(fila["ingreso_industrial"]),
+                    "actividadFinanciera": remu(fila["ingreso_financiero"]),
+                    "serviciosProfesionales": remu(fila["ingreso_profesional"]),
+                    "enajenacionBienes": remu(fila["ingreso_enajenacion"]),
+                    "otrosIngresos": remu(fila["otros_ingresos"]),
+                },
+                "bienesInmuebles": {
+                    "bienInmueble": _lista_bienes(fila["inmuebles_total"], "valorAdquisicion", extra)
+                },
+                "vehiculos": {
+                    "vehiculo": _lista_bienes(fila["vehiculos_total"], "valorAdquisicion", extra)
+                },
+                "bienesMuebles": {
+                    "bienMueble": _lista_bienes(fila["muebles_total"], "valorAdquisicion", extra)
+                },
+                "adeudos": {
+                    "adeudo": _lista_bienes(fila["adeudos_total"], "montoOriginal", extra)
+                },
+                "actividadAnualAnterior": {"ninguno": True, **extra},
+                "datosCurricularesDeclarante": {"escolaridad": [extra] * 3},
+                "experienciaLaboral": {"experiencia": [extra] * 5},
+            },
+            "interes": {"participacion": {"participacion": [extra] * 2}},
+        },
+    }
+
+
+def generar_declaraciones(n, semilla=42, relleno=0):
+    """Lista de n declaraciones PDN S1 sintéticas."""
+    filas = generar_filas(n, semilla)
+    return [declaracion_desde_fila(f, relleno) for f in filas.to_dict("records")]
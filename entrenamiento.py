@@ -0,0 +1,268 @@
+"""
+ENTRENAMIENTO Y BARRIDO DE PARÁMETROS - PatrimonIA
+Experimentos con IsolationForest sin repetir el preprocesamiento:
+
+1. La matriz de features se imputa (mediana) y estandariza una sola vez y,
+   por cada conjunto de features, se guarda como float32 en un .npy mapeado
+   en memoria (con llave por hash de los datos), junto con la matriz cruda
+   de esas mismas columnas.
+2. Cada candidato entrena sus árboles en paralelo (n_jobs) y los candidatos
+   del barrido corren en procesos separados que abren las matrices de su
+   conjunto sin copiarlas.
+3. Igual que el notebook (y puntuacion.scores_crudos), el modelo se ajusta
+   sobre la matriz escalada y se puntúa con decision_function sobre la
+   matriz cruda.
+4. Por candidato se reporta tiempo de entrenamiento, estabilidad del score
+   entre semillas (correlación de Spearman promedio) y proporción de casos
+   Alto (riesgo_modelo >= 80 con la normalización 0–100 del notebook).
+
+Nota: contamination sólo mueve el umbral interno (offset_) del modelo; como
+riesgo_modelo se normaliza con min/max, no cambia la proporción de Alto.
+
+Para ejecutar:
+python entrenamiento.py --datos resultados_anticorrupcion.csv --max-samples auto 1024 4096
+"""
+
+import argparse
+import hashlib
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import IsolationForest
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from claves import calcular_clave
+from puntuacion import (
+    FEATURES,
+    PARAMETROS_MODELO,
+    UMBRAL_ANOMALIA,
+    aplicar_reglas,
+    calcular_percentiles,
+    construir_features,
+)
+
+TAM_BLOQUE = 100_000  # filas por bloque al escribir la matriz
+
+# Conjuntos de features a comparar (índices sobre FEATURES)
+CONJUNTOS_FEATURES = {
+    "completo": FEATURES,
+    "sin_score_reglas": [f for f in FEATURES if f != "score_reglas"],
+    "montos": [
+        "total_ingresos",
+        "patrimonio_bruto",
+        "inmuebles_total",
+        "vehiculos_total",
+        "muebles_total",
+        "adeudos_total",
+    ],
+}
+
+
+# ============================================
+# MATRIZ PREPROCESADA
+# ============================================
+
+
+def preparar_matrices(data, conjuntos=None, directorio=".cache_entrenamiento"):
+    """
+    Imputa y estandariza data[FEATURES] una vez y guarda, por conjunto de
+    features, la matriz escalada (para ajustar) y la cruda (para puntuar)
+    como float32 en .npy mapeables. Regresa {conjunto: (ruta_escalada,
+    ruta_cruda)}; las matrices que ya existen para los mismos datos no se
+    recalculan.
+    """
+    conjuntos = conjuntos or CONJUNTOS_FEATURES
+    X = data[FEATURES]
+    # Hash de los hashes por fila en orden: filas reordenadas dan otra llave
+    hashes = pd.util.hash_pandas_object(X, index=False).to_numpy()
+    huella = hashlib.sha256(hashes.tobytes()).hexdigest()
+
+    rutas, pendientes = {}, {}
+    for nombre, features in conjuntos.items():
+        rutas[nombre] = tuple(
+            os.path.join(directorio, f"matriz-{calcular_clave(features, huella, tipo)}.npy")
+            for tipo in ("escalada", "cruda")
+        )
+        if not all(os.path.exists(r) for r in rutas[nombre]):
+            pendientes[nombre] = [FEATURES.index(f) for f in features]
+    if not pendientes:
+        return rutas
+
+    os.makedirs(directorio, exist_ok=True)
+    # Imputación y escalado son por columna: ajustar sobre todas las FEATURES
+    # da lo mismo para cualquier subconjunto
+    prep = Pipeline(
+        [
+            ("imputer", SimpleImputer(strategy="median")),
+            ("scaler", StandardScaler()),
+        ]
+    ).fit(X)
+
+    matrices = {}
+    for nombre, columnas in pendientes.items():
+        for ruta in rutas[nombre]:
+            matrices[ruta + ".tmp.npy"] = np.lib.format.open_memmap(
+                ruta + ".tmp.npy", mode="w+", dtype=np.float32, shape=(len(X), len(columnas))
+            )
+
+    for inicio in range(0, len(X), TAM_BLOQUE):
+        fin = inicio + TAM_BLOQUE
+        bloque = X.iloc[inicio:fin]
+        crudo = bloque.to_numpy(dtype=np.float64)
+        escalado = prep.transform(bloque)
+        for nombre, columnas in pendientes.items():
+            ruta_escalada, ruta_cruda = rutas[nombre]
+            matrices[ruta_escalada + ".tmp.npy"][inicio:fin] = escalado[:, columnas]
+            matrices[ruta_cruda + ".tmp.npy"][inicio:fin] = crudo[:, columnas]
+
+    for ruta_tmp in matrices:
+        matrices[ruta_tmp].flush()
+    # Cerrar todos los memmaps antes de renombrar (Windows no renombra archivos abiertos)
+    rutas_tmp = list(matrices)
+    matrices.clear()
+    for ruta_tmp in rutas_tmp:
+        os.replace(ruta_tmp, ruta_tmp[: -len(".tmp.npy")])
+    return rutas
+
+
+# ============================================
+# CANDIDATOS
+# ============================================
+
+
+def _rangos(x):
+    """Rangos (0..n-1) para la correlación de Spearman."""
+    r = np.empty(len(x), dtype=np.float64)
+    r[np.argsort(x, kind="stable")] = np.arange(len(x))
+    return r
+
+
+def estabilidad_spearman(scores):
+    """Correlación de Spearman promedio entre todos los pares de corridas."""
+    if len(scores) < 2:
+        return np.nan
+    rangos = [_rangos(s) for s in scores]
+    return float(np.mean([np.corrcoef(a, b)[0, 1] for a, b in itertools.combinations(rangos, 2)]))
+
+
+def entrenar_candidato(rutas, parametros, semillas, n_jobs=-1):
+    """
+    Entrena un candidato con cada semilla sobre las matrices mapeadas de su
+    conjunto de features y regresa sus métricas. Se ejecuta en un proceso
+    del barrido.
+    """
+    ruta_escalada, ruta_cruda = rutas
+    X = np.load(ruta_escalada, mmap_mode="r")
+    X_crudo = np.load(ruta_cruda, mmap_mode="r")
+
+    tiempos, altos, scores = [], [], []
+    for semilla in semillas:
+        modelo = IsolationForest(**parametros, random_state=semilla, n_jobs=n_jobs)
+        inicio = time.perf_counter()
+        modelo.fit(X)
+        tiempos.append(time.perf_counter() - inicio)
+
+        raw = -modelo.decision_function(X_crudo)
+        rango = raw.max() - raw.min()
+        riesgo = 100 * (raw - raw.min()) / rango if rango > 0 else np.zeros_like(raw)
+        altos.append(float((riesgo.round(2) >= UMBRAL_ANOMALIA).mean()))
+        scores.append(raw)
+
+    return {
+        "segundos_entrenamiento": float(np.mean(tiempos)),
+        "estabilidad_spearman": estabilidad_spearman(scores),
+        "proporcion_alto": float(np.mean(altos)),
+        "proporcion_alto_std": float(np.std(altos)),
+    }
+
+
+def generar_candidatos(n_estimators, max_samples, contamination, conjuntos):
+    """Producto cartesiano de hiperparámetros y conjuntos de features."""
+    for n, m, c, nombre in itertools.product(n_estimators, max_samples, contamination, conjuntos):
+        yield nombre, {"n_estimators": n, "max_samples": m, "contamination": c}
+
+
+def barrido(data, n_estimators=(PARAMETROS_MODELO["n_estimators"],), max_samples=("auto",),
+            contamination=(PARAMETROS_MODELO["contamination"],), conjuntos=None,
+            semillas=(42, 43, 44), procesos=None, directorio=".cache_entrenamiento"):
+    """
+    Corre el barrido de candidatos en paralelo y regresa un DataFrame con
+    sus métricas. `data` debe tener las FEATURES (con score_reglas).
+    """
+    conjuntos = conjuntos or CONJUNTOS_FEATURES
+    rutas = preparar_matrices(data, conjuntos, directorio)
+
+    candidatos = list(generar_candidatos(n_estimators, max_samples, contamination, conjuntos))
+    nucleos = os.cpu_count() or 1
+    procesos = procesos or min(len(candidatos), nucleos)
+    # Los núcleos se reparten entre procesos del barrido y árboles de cada candidato
+    n_jobs = max(1, nucleos // procesos)
+
+    resultados = Parallel(n_jobs=procesos)(
+        delayed(entrenar_candidato)(rutas[nombre], parametros, semillas, n_jobs)
+        for nombre, parametros in candidatos
+    )
+
+    filas = [
+        {"features": nombre, **parametros, **metricas}
+        for (nombre, parametros), metricas in zip(candidatos, resultados)
+    ]
+    return pd.DataFrame(filas)
+
+
+def _max_samples(valor):
+    """max_samples acepta 'auto', enteros o fracciones."""
+    if valor == "auto":
+        return valor
+    return float(valor) if "." in valor else int(valor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de IsolationForest")
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--datos", help="CSV con las columnas base o de resultados")
+    origen.add_argument("--sinteticos", type=int, help="Usa N filas sintéticas")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[PARAMETROS_MODELO["n_estimators"]])
+    parser.add_argument("--max-samples", type=_max_samples, nargs="+", default=["auto"])
+    parser.add_argument("--contamination", type=float, nargs="+", default=[PARAMETROS_MODELO["contamination"]])
+    parser.add_argument("--features", nargs="+", choices=list(CONJUNTOS_FEATURES),
+                        default=list(CONJUNTOS_FEATURES))
+    parser.add_argument("--semillas", type=int, default=3, help="Corridas por candidato")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--salida", default=None, help="CSV con los resultados del barrido")
+    args = parser.parse_args()
+
+    if args.sinteticos:
+        from datos_sinteticos import generar_filas
+        df = generar_filas(args.sinteticos)
+    else:
+        df = pd.read_csv(args.datos, low_memory=False)
+
+    data = construir_features(df)
+    aplicar_reglas(data, **calcular_percentiles(data))
+
+    inicio = time.perf_counter()
+    resultados = barrido(
+        data,
+        n_estimators=args.n_estimators,
+        max_samples=args.max_samples,
+        contamination=args.contamination,
+        conjuntos={k: CONJUNTOS_FEATURES[k] for k in args.features},
+        semillas=list(range(42, 42 + args.semillas)),
+        procesos=args.procesos,
+    )
+    print(resultados.to_string(index=False))
+    print(f"Barrido de {len(resultados)} candidatos en {time.perf_counter() - inicio:.1f} s")
+
+    if args.salida:
+        resultados.to_csv(args.salida, index=False)
+
+
+if __name__ == "__main__":
+    main()
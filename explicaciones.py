@@ -0,0 +1,163 @@
+"""
+EXPLICACIONES DE riesgo_modelo - PatrimonIA
+Atribución por feature del score de IsolationForest, precalculada en lote
+para que la ficha del dashboard la muestre al instante.
+
+Método (longitud de camino): en cada árbol, cada split en el camino de la
+declaración hacia su hoja acredita a la feature del split con peso
+1 / longitud_del_camino (profundidad + c(n) de la hoja, como en el score de
+IsolationForest). Las features que aíslan rápido a una declaración reciben
+más peso. Se suma sobre los árboles y se normaliza por fila (suma = 1).
+
+Sólo se guardan las k features con mayor peso por declaración: índice
+(int8) y peso (float16). Las explicaciones son del modelo que ajustó
+pipeline.py (--modelo), el mismo que produjo riesgo_modelo en el CSV.
+
+Para ejecutar:
+python explicaciones.py --datos resultados_anticorrupcion.csv --modelo modelo_riesgo.joblib \
+    --salida explicaciones_riesgo.npz
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+
+from puntuacion import FEATURES, ModeloRiesgo
+
+TAM_BLOQUE = 50_000
+TOP_K = 3
+
+_EULER = 0.5772156649
+
+
+def _longitud_promedio(n):
+    """c(n): longitud promedio de camino en un BST con n muestras (Liu et al.)."""
+    n = np.asarray(n, dtype=np.float64)
+    c = np.zeros_like(n)
+    c[n == 2] = 1.0
+    mayores = n > 2
+    m = n[mayores]
+    c[mayores] = 2.0 * (np.log(m - 1.0) + _EULER) - 2.0 * (m - 1.0) / m
+    return c
+
+
+def _atribuciones_bloque(bosque, X):
+    """Atribuciones normalizadas (n × features) para un bloque de filas."""
+    n, num_features = X.shape
+    contrib = np.zeros((n, num_features))
+
+    for arbol, columnas in zip(bosque.estimators_, bosque.estimators_features_):
+        Xs = X[:, columnas]
+        t = arbol.tree_
+
+        camino = arbol.decision_path(Xs)
+        hojas = arbol.apply(Xs)
+        longitud = np.asarray(camino.sum(axis=1)).ravel() - 1 + _longitud_promedio(t.n_node_samples[hojas])
+        longitud = np.maximum(longitud, 1.0)
+
+        # Matriz nodo -> feature original de su split (las hojas no cuentan)
+        nodos = np.flatnonzero(t.feature >= 0)
+        nodo_feature = sparse.csr_matrix(
+            (np.ones(len(nodos)), (nodos, columnas[t.feature[nodos]])),
+            shape=(t.node_count, num_features),
+        )
+        contrib += (camino @ nodo_feature).toarray() / longitud[:, None]
+
+    total = contrib.sum(axis=1, keepdims=True)
+    return np.divide(contrib, total, out=np.zeros_like(contrib), where=total > 0)
+
+
+def _top_bloque(bosque, X, k):
+    """Top k (índices, pesos) de un bloque."""
+    atrib = _atribuciones_bloque(bosque, X)
+    indices = np.argsort(-atrib, axis=1, kind="stable")[:, :k]
+    pesos = np.take_along_axis(atrib, indices, axis=1)
+    return indices.astype(np.int8), pesos.astype(np.float16)
+
+
+def calcular_explicaciones(modelo, data, k=TOP_K, tam_bloque=TAM_BLOQUE, n_jobs=-1):
+    """
+    Top k contribuciones por fila para un ModeloRiesgo ajustado. `data` debe
+    tener las FEATURES. Los bloques de filas se procesan en paralelo.
+    """
+    # Igual que scores_crudos: el bosque recorre las features sin imputar ni escalar
+    X = data[FEATURES].to_numpy(dtype=np.float32)
+    bosque = modelo.pipeline.named_steps["model"]
+
+    bloques = Parallel(n_jobs=n_jobs)(
+        delayed(_top_bloque)(bosque, X[inicio:inicio + tam_bloque], k)
+        for inicio in range(0, len(X), tam_bloque)
+    )
+    if not bloques:
+        return np.empty((0, k), dtype=np.int8), np.empty((0, k), dtype=np.float16)
+    return np.vstack([b[0] for b in bloques]), np.vstack([b[1] for b in bloques])
+
+
+def guardar_explicaciones(ruta, ids, indices, pesos):
+    """Guarda ids, índices y pesos en un .npz comprimido."""
+    np.savez_compressed(
+        ruta,
+        ids=np.asarray(ids).astype(str),
+        indices=indices,
+        pesos=pesos,
+        features=np.array(FEATURES),
+    )
+
+
+class Explicaciones:
+    """Consulta de las contribuciones precalculadas por id de declaración."""
+
+    def __init__(self, ids, indices, pesos, features):
+        # Puede haber ids repetidos entre archivos PDN; sin otra llave única no
+        # se sabe cuál fila es cuál, así que esos ids no tienen explicación
+        ids = pd.Index(np.asarray(ids).astype(str))
+        unicos = ~ids.duplicated(keep=False)
+        self.posicion = ids[unicos]
+        self.filas = np.flatnonzero(unicos)
+        self.indices = indices
+        self.pesos = pesos
+        self.features = [str(f) for f in features]
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee un .npz de guardar_explicaciones."""
+        with np.load(ruta) as z:
+            return cls(z["ids"], z["indices"], z["pesos"], z["features"])
+
+    def de(self, id_declaracion):
+        """Lista [(feature, peso)] de una declaración (vacía si no existe o su id se repite)."""
+        pos = self.posicion.get_indexer([str(id_declaracion)])[0]
+        if pos < 0:
+            return []
+        fila = self.filas[pos]
+        return [
+            (self.features[i], float(p))
+            for i, p in zip(self.indices[fila], self.pesos[fila])
+            if p > 0
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula explicaciones de riesgo_modelo")
+    parser.add_argument("--datos", required=True, help="CSV con columnas base o de resultados")
+    parser.add_argument("--modelo", default="modelo_riesgo.joblib",
+                        help="Modelo ajustado que guardó pipeline.py")
+    parser.add_argument("--salida", default="explicaciones_riesgo.npz")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.datos, low_memory=False)
+    modelo = ModeloRiesgo.cargar(args.modelo)
+    data = modelo.puntuar(df)
+
+    indices, pesos = calcular_explicaciones(modelo, data, k=args.k, n_jobs=args.n_jobs)
+    guardar_explicaciones(args.salida, data["id"], indices, pesos)
+    print(f"{len(indices):,} explicaciones guardadas en:", args.salida)
+
+
+if __name__ == "__main__":
+    main()
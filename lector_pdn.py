@@ -0,0 +1,264 @@
+"""
+LECTOR SELECTIVO PDN S1 - PatrimonIA
+Lee los archivos JSON de declaraciones registro por registro, sin cargar el
+arreglo completo en memoria, y genera las mismas filas compactas que la
+celda de lectura del notebook.
+
+Dos motores:
+- "stdlib" (por omisión): separa el arreglo en registros con
+  json.JSONDecoder.raw_decode y decodifica un registro a la vez. No requiere
+  dependencias extra y es el más rápido.
+- "ijson": recorre los eventos del parser en streaming y sólo materializa las
+  rutas que usa el análisis (datosGenerales, datosEmpleoCargoComision, valores
+  de ingresos y bienes/adeudos con titular DEC). Requiere `ijson`; usa la
+  menor memoria pero es más lento porque cada evento pasa por Python.
+
+Los errores se regresan como dicts {"ruta", "registro", "tipo", "mensaje"} en
+lugar de imprimirse.
+"""
+
+import json
+
+import numpy as np
+
+from puntuacion import fila_desde_declaracion
+
+try:
+    import ijson
+except ImportError:  # ijson es opcional; se usa el motor stdlib
+    ijson = None
+
+TAM_BLOQUE = 1 << 20  # 1 MiB por lectura
+
+# ============================================
+# RUTAS REQUERIDAS (motor ijson)
+# ============================================
+
+_SP = "item.declaracion.situacionPatrimonial"
+_ING = f"{_SP}.ingresos"
+
+# prefijo ijson -> columna de la fila
+_ESCALARES = {
+    "item.id": "id",
+    "item.anioEjercicio": "anio",
+    "item.metadata.tipo": "tipo",
+    "item.metadata.institucion": "institucion",
+    f"{_SP}.datosGenerales.nombre": "nombre",
+    f"{_SP}.datosGenerales.primerApellido": "primerApellido",
+    f"{_SP}.datosGenerales.segundoApellido": "segundoApellido",
+    f"{_SP}.datosEmpleoCargoComision.empleoCargoComision": "cargo",
+    f"{_SP}.datosEmpleoCargoComision.nivelOrdenGobierno": "nivelGobierno",
+    f"{_SP}.datosEmpleoCargoComision.nombreEntePublico": "ente",
+    f"{_ING}.remuneracionAnualCargoPublico.valor": "ingreso_cargo",
+    f"{_ING}.ingresoAnualNetoDeclarante.valor": "ingreso_neto",
+    f"{_ING}.actividadIndustrialComercialEmpresarial.remuneracionTotal.valor": "ingreso_industrial",
+    f"{_ING}.actividadFinanciera.remuneracionTotal.valor": "ingreso_financiero",
+    f"{_ING}.serviciosProfesionales.remuneracionTotal.valor": "ingreso_profesional",
+    f"{_ING}.enajenacionBienes.remuneracionTotal.valor": "ingreso_enajenacion",
+    f"{_ING}.otrosIngresos.remuneracionTotal.valor": "otros_ingresos",
+}
+
+# Listas filtradas a titular DEC: prefijo del elemento -> (columna, campo del monto)
+_LISTAS = {
+    f"{_SP}.bienesInmuebles.bienInmueble.item": ("inmuebles_total", "valorAdquisicion"),
+    f"{_SP}.vehiculos.vehiculo.item": ("vehiculos_total", "valorAdquisicion"),
+    f"{_SP}.bienesMuebles.bienMueble.item": ("muebles_total", "valorAdquisicion"),
+    f"{_SP}.adeudos.adeudo.item": ("adeudos_total", "montoOriginal"),
+}
+_ELEMENTOS = {p: col for p, (col, _) in _LISTAS.items()}
+_CLAVES_TITULAR = {f"{p}.titular.item.clave": col for p, (col, _) in _LISTAS.items()}
+_MONTOS = {f"{p}.{campo}.valor": col for p, (col, campo) in _LISTAS.items()}
+
+_COLUMNAS_NUMERICAS = {
+    "ingreso_cargo", "ingreso_neto", "ingreso_industrial", "ingreso_financiero",
+    "ingreso_profesional", "ingreso_enajenacion", "otros_ingresos",
+}
+_COLUMNAS_FILA = list(_ESCALARES.values()) + list(_ELEMENTOS.values())
+
+_EVENTOS_ESCALARES = {"string", "number", "boolean", "null"}
+
+
+def _fila_vacia():
+    """Fila con los mismos valores por omisión que la lectura del notebook."""
+    return {
+        col: (np.nan if col in _COLUMNAS_NUMERICAS else None)
+        for col in _COLUMNAS_FILA
+    }
+
+
+def _filas_ijson(f, ruta, errores):
+    """
+    Genera (indice, fila) recorriendo los eventos de ijson. Mismo criterio
+    que el motor stdlib: el nivel superior debe ser un arreglo y los
+    elementos que no son objetos se reportan como error.
+    """
+    fila = sumas = None
+    es_dec = False
+    monto = None
+    indice = -1
+
+    for prefijo, evento, v in ijson.parse(f, use_float=True):
+        if prefijo == "":
+            if evento not in ("start_array", "end_array"):
+                raise ValueError("Se esperaba un arreglo JSON de declaraciones")
+            continue
+
+        if prefijo == "item":
+            if evento == "start_map":
+                indice += 1
+                fila = _fila_vacia()
+                sumas = dict.fromkeys(_ELEMENTOS.values(), 0)
+            elif evento == "end_map":
+                for col, total in sumas.items():
+                    fila[col] = total if total > 0 else np.nan
+                yield indice, fila
+            elif evento in _EVENTOS_ESCALARES or evento == "start_array":
+                indice += 1
+                tipo = "list" if evento == "start_array" else type(v).__name__
+                errores.append(_error(ruta, TypeError(f"Se esperaba un objeto JSON, no {tipo}"), indice))
+            continue
+
+        col = _ESCALARES.get(prefijo)
+        if col is not None:
+            if evento in _EVENTOS_ESCALARES:
+                fila[col] = v
+            continue
+
+        col = _ELEMENTOS.get(prefijo)
+        if col is not None:
+            if evento == "start_map":
+                es_dec, monto = False, None
+            elif evento == "end_map":
+                if es_dec and isinstance(monto, (int, float)):
+                    sumas[col] += monto
+            continue
+
+        if v == "DEC" and prefijo in _CLAVES_TITULAR:
+            es_dec = True
+        elif evento in ("number", "boolean") and prefijo in _MONTOS:
+            # bool cuenta como número igual que en sumar_bienes / sumar_adeudos
+            monto = v
+
+
+# ============================================
+# MOTOR STDLIB
+# ============================================
+
+
+def _iterar_registros(f, tam_bloque=TAM_BLOQUE):
+    """
+    Genera cada elemento del arreglo JSON de nivel superior, decodificando
+    uno a la vez. El buffer sólo contiene el registro en curso.
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(tam_bloque)
+    pos = 0
+    eof = not buffer
+
+    def _saltar_espacios():
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            buffer, pos = f.read(tam_bloque), 0
+            eof = not buffer
+
+    _saltar_espacios()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise ValueError("Se esperaba un arreglo JSON de declaraciones")
+    pos += 1
+
+    primero = True
+    while True:
+        _saltar_espacios()
+        if pos >= len(buffer):
+            raise ValueError("Arreglo JSON incompleto")
+        if buffer[pos] == "]":
+            return
+        if not primero:
+            if buffer[pos] != ",":
+                raise ValueError(f"Se esperaba ',' y se encontró {buffer[pos]!r}")
+            pos += 1
+            _saltar_espacios()
+        primero = False
+
+        while True:
+            try:
+                registro, fin = decoder.raw_decode(buffer, pos)
+                # Un número pegado al final del buffer puede seguir en el
+                # siguiente bloque ("12" de "12.5"): sólo se acepta con más datos
+                if fin < len(buffer) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            # Registro cortado por el bloque: leemos más y reintentamos
+            bloque = f.read(max(tam_bloque, len(buffer) - pos))
+            eof = not bloque
+            buffer, pos = buffer[pos:] + bloque, 0
+        pos = fin
+        yield registro
+
+
+def _filas_stdlib(f, ruta, errores):
+    """Genera (indice, fila) con el motor stdlib; los registros malos se reportan."""
+    for indice, d in enumerate(_iterar_registros(f)):
+        try:
+            yield indice, fila_desde_declaracion(d)
+        except Exception as e:
+            errores.append(_error(ruta, e, indice))
+
+
+# ============================================
+# API
+# ============================================
+
+
+def _error(ruta, e, registro=None):
+    """Error estructurado por archivo/registro."""
+    return {
+        "ruta": ruta,
+        "registro": registro,
+        "tipo": type(e).__name__,
+        "mensaje": str(e),
+    }
+
+
+def validar_motor(motor):
+    """Verifica que el motor exista y esté instalado."""
+    if motor == "ijson" and ijson is None:
+        raise ImportError("El motor 'ijson' requiere instalar ijson")
+    if motor not in ("ijson", "stdlib"):
+        raise ValueError(f"Motor desconocido: {motor}")
+    return motor
+
+
+def iterar_filas(ruta, errores, motor="stdlib"):
+    """
+    Genera las filas de un archivo PDN S1. Los errores (de lectura o de
+    registros individuales) se agregan a `errores` y no detienen el proceso;
+    un error de sintaxis corta el archivo en el último registro válido.
+    """
+    validar_motor(motor)
+    indice = -1
+    try:
+        if motor == "ijson":
+            with open(ruta, "rb") as f:
+                for indice, fila in _filas_ijson(f, ruta, errores):
+                    yield fila
+        else:
+            with open(ruta, "r", encoding="utf-8") as f:
+                for indice, fila in _filas_stdlib(f, ruta, errores):
+                    yield fila
+    except Exception as e:
+        errores.append(_error(ruta, e, indice + 1 if indice >= 0 else None))
+
+
+def leer_archivos(rutas, motor="stdlib"):
+    """Lee varios archivos y regresa (filas, errores)."""
+    filas, errores = [], []
+    for ruta in rutas:
+        filas.extend(iterar_filas(ruta, errores, motor))
+    return filas, errores
@@ -0,0 +1,296 @@
+"""
+RESULTADOS PARTICIONADOS - PatrimonIA
+Escribe los resultados del análisis particionados por año y cubeta (hash) de
+institución, con un manifiesto que permite leer sólo las particiones que
+coinciden con un filtro o que pueden contener los Top N de mayor score.
+
+Cada partición se escribe ordenada por score descendente y el manifiesto
+guarda, por partición, el K-ésimo mayor score (TOP_K). Con eso el Top N
+(N <= TOP_K) sólo lee las primeras filas de las particiones candidatas.
+
+Junto al manifiesto se guardan los arreglos del simulador de umbrales
+(simulador.npz): columnas de las reglas y scores ordenados de todo el
+dataset, para simular sin leer las particiones.
+
+Estructura:
+    resultados_particionados/
+    ├─ manifiesto.json
+    ├─ simulador.npz
+    └─ anio=2023/cubeta=007/parte.csv
+
+Para ejecutar:
+python particiones.py resultados_anticorrupcion.csv resultados_particionados
+"""
+
+import argparse
+import json
+import os
+import shutil
+import zlib
+
+import pandas as pd
+
+from simulador import SimuladorUmbrales
+
+NOMBRE_MANIFIESTO = "manifiesto.json"
+NOMBRE_SIMULADOR = "simulador.npz"
+NUM_CUBETAS = 64
+
+# Columnas de score con min/max por partición (poda de Top N); la primera
+# presente es la que ordena las filas de cada partición
+COLUMNAS_SCORE = ["score_riesgo_total", "riesgo_score", "riesgo_modelo", "score_reglas"]
+
+# Umbral por partición: K-ésimo mayor score (máximo del slider de Top N)
+TOP_K = 50
+
+
+def cubeta_institucion(institucion, num_cubetas=NUM_CUBETAS):
+    """Cubeta estable (crc32) para una institución."""
+    texto = "" if pd.isna(institucion) else str(institucion)
+    return zlib.crc32(texto.encode("utf-8")) % num_cubetas
+
+
+def _valor_anio(anio):
+    """Año como texto para la ruta de la partición."""
+    if pd.isna(anio):
+        return "desconocido"
+    try:
+        return str(int(anio))
+    except (TypeError, ValueError):
+        return str(anio)
+
+
+def _resumen_particion(parte, ruta_relativa, anio, cubeta):
+    """Entrada del manifiesto: conteos, min/max de scores y agregados globales."""
+    entrada = {
+        "ruta": ruta_relativa,
+        "anio": anio,
+        "cubeta": cubeta,
+        "filas": int(len(parte)),
+        "instituciones": {},
+        "scores": {},
+        "top_k": {},
+        "niveles": {},
+    }
+    if "institucion" in parte.columns:
+        conteo = parte["institucion"].fillna("").astype(str).value_counts()
+        entrada["instituciones"] = {k: int(v) for k, v in conteo.items()}
+    for col in COLUMNAS_SCORE:
+        if col in parte.columns:
+            valores = pd.to_numeric(parte[col], errors="coerce")
+            if valores.notna().any():
+                entrada["scores"][col] = [float(valores.min()), float(valores.max())]
+            if valores.count() >= TOP_K:
+                entrada["top_k"][col] = float(valores.nlargest(TOP_K).iloc[-1])
+    if "riesgo_nivel" in parte.columns:
+        conteo = parte["riesgo_nivel"].astype(str).value_counts()
+        entrada["niveles"] = {k: int(v) for k, v in conteo.items()}
+    # Agregados para las métricas globales del dashboard sin leer las filas
+    if "patrimonio_bruto" in parte.columns:
+        entrada["con_patrimonio"] = int((pd.to_numeric(parte["patrimonio_bruto"], errors="coerce") > 0).sum())
+    if "total_ingresos" in parte.columns:
+        ingresos = pd.to_numeric(parte["total_ingresos"], errors="coerce")
+        entrada["suma_ingresos"] = float(ingresos.sum())
+        entrada["n_ingresos"] = int(ingresos.notna().sum())
+    return entrada
+
+
+def exportar_particionado(df, directorio, num_cubetas=NUM_CUBETAS):
+    """
+    Escribe df particionado por anio y cubeta de institución y regresa el
+    manifiesto. Las particiones anteriores del directorio se reemplazan.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    for nombre in os.listdir(directorio):
+        if nombre.startswith("anio="):
+            shutil.rmtree(os.path.join(directorio, nombre))
+
+    anios = df["anio"].map(_valor_anio) if "anio" in df.columns else pd.Series("desconocido", index=df.index)
+    if "institucion" in df.columns:
+        cubetas = df["institucion"].map(lambda x: cubeta_institucion(x, num_cubetas))
+    else:
+        cubetas = pd.Series(0, index=df.index)
+
+    orden = next((c for c in COLUMNAS_SCORE if c in df.columns), None)
+
+    particiones = []
+    for (anio, cubeta), parte in df.groupby([anios, cubetas], sort=True):
+        if orden is not None:
+            parte = parte.sort_values(orden, ascending=False, kind="stable", na_position="last")
+        ruta_relativa = f"anio={anio}/cubeta={cubeta:03d}/parte.csv"
+        ruta = os.path.join(directorio, ruta_relativa)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        parte.to_csv(ruta, index=False)
+        particiones.append(_resumen_particion(parte, ruta_relativa, anio, int(cubeta)))
+
+    SimuladorUmbrales(df).guardar(os.path.join(directorio, NOMBRE_SIMULADOR))
+
+    manifiesto = {
+        "version": 3,
+        "num_cubetas": num_cubetas,
+        "orden": orden,
+        "simulador": NOMBRE_SIMULADOR,
+        "total_filas": int(len(df)),
+        "columnas": df.columns.tolist(),
+        "particiones": particiones,
+    }
+
+    # El manifiesto se escribe al final y de forma atómica
+    ruta_tmp = os.path.join(directorio, NOMBRE_MANIFIESTO + ".tmp")
+    with open(ruta_tmp, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(ruta_tmp, os.path.join(directorio, NOMBRE_MANIFIESTO))
+    return manifiesto
+
+
+# ============================================
+# LECTURA CON PODA DE PARTICIONES
+# ============================================
+
+
+def cargar_manifiesto(directorio):
+    """Manifiesto del dataset particionado, o None si no existe."""
+    try:
+        with open(os.path.join(directorio, NOMBRE_MANIFIESTO), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def instituciones(manifiesto):
+    """Lista ordenada de instituciones presentes en el dataset."""
+    nombres = set()
+    for p in manifiesto["particiones"]:
+        nombres.update(n for n in p["instituciones"] if n)
+    return sorted(nombres)
+
+
+def seleccionar_particiones(manifiesto, institucion=None, anios=None):
+    """Particiones que pueden contener filas de la institución / años dados."""
+    anios = None if anios is None else {_valor_anio(a) for a in anios}
+    seleccion = []
+    for p in manifiesto["particiones"]:
+        if anios is not None and p["anio"] not in anios:
+            continue
+        if institucion is not None and institucion not in p["instituciones"]:
+            continue
+        seleccion.append(p)
+    return seleccion
+
+
+def particiones_top_n(particiones, n, score_col):
+    """
+    Subconjunto de particiones que puede contener las n filas de mayor
+    score_col. Para n <= TOP_K, cada partición con umbral top_k tiene al menos
+    n filas con score >= ese umbral, así que el mayor de los umbrales es una
+    cota inferior del n-ésimo score global; se descartan las particiones cuyo
+    máximo queda por debajo.
+    """
+    con_score = [p for p in particiones if score_col in p["scores"]]
+    if n > TOP_K:
+        return con_score
+
+    umbrales = [p["top_k"][score_col] for p in con_score if score_col in p.get("top_k", {})]
+    if not umbrales:
+        return con_score
+    cota = max(umbrales)
+    return [p for p in con_score if p["scores"][score_col][1] >= cota]
+
+
+def leer_particion(directorio, particion):
+    """Lee una partición como DataFrame."""
+    return pd.read_csv(os.path.join(directorio, particion["ruta"]), low_memory=False)
+
+
+def leer_top_n(directorio, manifiesto, n, score_col, institucion=None, filtro=None):
+    """
+    Las n filas de mayor score_col entre las que cumplen la institución y
+    `filtro` (función DataFrame -> máscara). Sin filtros se podan particiones
+    con particiones_top_n. Si las particiones están ordenadas por score_col,
+    de cada una se leen sólo las primeras filas y el resto únicamente si en
+    ellas no quedan n filas que cumplan los filtros.
+    """
+    def filtrar(parte):
+        if institucion is not None and "institucion" in parte.columns:
+            parte = parte[parte["institucion"] == institucion]
+        if filtro is not None:
+            parte = parte[filtro(parte)]
+        return parte
+
+    particiones = seleccionar_particiones(manifiesto, institucion=institucion)
+    if institucion is None and filtro is None:
+        particiones = particiones_top_n(particiones, n, score_col)
+    ordenadas = manifiesto.get("orden") == score_col
+    cabeza = max(n, TOP_K)
+
+    partes = []
+    for p in particiones:
+        if not ordenadas or p["filas"] <= cabeza:
+            partes.append(filtrar(leer_particion(directorio, p)))
+            continue
+        with pd.read_csv(os.path.join(directorio, p["ruta"]), low_memory=False, iterator=True) as lector:
+            parte = filtrar(lector.get_chunk(cabeza))
+            partes.append(parte)
+            if len(parte) < n:
+                partes.append(filtrar(lector.read()))
+
+    if not partes:
+        return pd.DataFrame()
+    df = pd.concat(partes, ignore_index=True)
+    if score_col not in df.columns:
+        return df.head(0)
+    return df.nlargest(n, score_col).reset_index(drop=True)
+
+
+def leer_particiones(directorio, particiones, institucion=None, lector=None):
+    """
+    Concatena las particiones dadas. Como una cubeta mezcla instituciones,
+    se filtra la institución exacta después de leer.
+    """
+    lector = lector or leer_particion
+    partes = [lector(directorio, p) for p in particiones]
+    if not partes:
+        return pd.DataFrame()
+    df = pd.concat(partes, ignore_index=True)
+    if institucion is not None and "institucion" in df.columns:
+        df = df[df["institucion"] == institucion].reset_index(drop=True)
+    return df
+
+
+def metricas_manifiesto(manifiesto):
+    """Métricas globales (mismas llaves que calcular_metricas) desde el manifiesto."""
+    total = alto = medio = bajo = con_patrimonio = n_ingresos = 0
+    suma_ingresos = 0.0
+    for p in manifiesto["particiones"]:
+        total += p["filas"]
+        alto += p["niveles"].get("Alto", 0)
+        medio += p["niveles"].get("Medio", 0)
+        bajo += p["niveles"].get("Bajo", 0)
+        con_patrimonio += p.get("con_patrimonio", 0)
+        suma_ingresos += p.get("suma_ingresos", 0.0)
+        n_ingresos += p.get("n_ingresos", 0)
+    return {
+        "total": total,
+        "alto": alto,
+        "medio": medio,
+        "bajo": bajo,
+        "cobertura_patrimonial": con_patrimonio / total if total > 0 else 0,
+        "ingreso_promedio": suma_ingresos / n_ingresos if n_ingresos > 0 else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta resultados particionados")
+    parser.add_argument("csv", help="CSV de resultados (resultados_anticorrupcion.csv)")
+    parser.add_argument("directorio", help="Directorio de salida")
+    parser.add_argument("--cubetas", type=int, default=NUM_CUBETAS)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, low_memory=False)
+    manifiesto = exportar_particionado(df, args.directorio, num_cubetas=args.cubetas)
+    print(f"{manifiesto['total_filas']:,} filas en {len(manifiesto['particiones'])} particiones:",
+          args.directorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""
+PIPELINE DE ANÁLISIS - PatrimonIA
+Las celdas del notebook como etapas con caché en disco: cada etapa se guarda
+con una llave que es el hash de su código (la etapa y los módulos que llama),
+sus parámetros y las llaves de las etapas de las que depende. Si nada de eso
+cambió, la etapa se salta y se lee su resultado de la caché; de cada etapa
+sólo se conserva el resultado de la última llave. Las etapas que
+escriben archivos dejan junto a cada salida un archivo `.clave` con su llave
+y se repiten si falta la salida o si la llave no coincide.
+
+Cada ejecución agrega a los metadatos un manifiesto con tiempo, filas de
+entrada/salida, memoria pico y si hubo acierto de caché por etapa.
+
+Para ejecutar:
+python pipeline.py --ruta-base "/ruta/PDN_S1/**/*.json" --porcentaje 0.10
+"""
+
+import argparse
+import glob
+import inspect
+import json
+import os
+import pickle
+import random
+import resource
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import explicaciones
+import lector_pdn
+import particiones
+import puntuacion
+import simulador
+from claves import calcular_clave, huella_archivos
+from explicaciones import calcular_explicaciones, guardar_explicaciones
+from lector_pdn import leer_archivos
+from particiones import exportar_particionado
+from puntuacion import (
+    FEATURES,
+    PARAMETROS_MODELO,
+    UMBRALES_REGLAS,
+    ModeloRiesgo,
+    aplicar_reglas,
+    calcular_percentiles,
+    construir_features,
+)
+
+VERSION = "1.2-pipeline"
+
+
+# ============================================
+# MEMORIA PICO POR ETAPA
+# ============================================
+
+
+def _reiniciar_pico_rss():
+    """
+    Reinicia el pico de RSS del proceso (Linux: escribir 5 en clear_refs
+    reinicia VmHWM). Regresa False si el sistema no lo permite.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _leer_status(campo):
+    """Valor en MiB de un campo de /proc/self/status (None fuera de Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith(campo + ":"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _rss_mb():
+    """RSS actual en MiB (None si no se puede leer)."""
+    return _leer_status("VmRSS")
+
+
+def _pico_rss_mb():
+    """Pico de RSS en MiB desde el último reinicio (o de todo el proceso)."""
+    pico = _leer_status("VmHWM")
+    if pico is not None:
+        return pico
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 if maxrss < 1 << 32 else maxrss / 2**20
+
+
+# ============================================
+# CACHÉ DE ETAPAS
+# ============================================
+
+
+def _codigo(objeto):
+    """Código fuente de una etapa o módulo (si cambia, la caché se invalida)."""
+    try:
+        return inspect.getsource(objeto)
+    except (OSError, TypeError):
+        return getattr(objeto, "__qualname__", objeto.__name__)
+
+
+def _ruta_clave(salida):
+    """Archivo junto a una salida con la llave de la etapa que la escribió."""
+    return salida + ".clave"
+
+
+def _salidas_vigentes(salidas, clave):
+    """True si todas las salidas existen y fueron escritas con esta llave."""
+    for salida in salidas:
+        try:
+            with open(_ruta_clave(salida), encoding="utf-8") as f:
+                if f.read().strip() != clave:
+                    return False
+        except FileNotFoundError:
+            return False
+        if not os.path.exists(salida):
+            return False
+    return True
+
+
+class PipelineCache:
+    """Ejecuta etapas con caché en disco y registra su costo."""
+
+    def __init__(self, directorio_cache=".cache_pipeline", forzar=False):
+        self.directorio = directorio_cache
+        self.forzar = forzar
+        self.etapas = []
+        os.makedirs(directorio_cache, exist_ok=True)
+
+    def _ruta(self, nombre, clave):
+        return os.path.join(self.directorio, f"{nombre}-{clave}.pkl")
+
+    def _leer(self, ruta):
+        with open(ruta, "rb") as f:
+            return pickle.load(f)
+
+    def _guardar(self, ruta, valor):
+        ruta_tmp = ruta + ".tmp"
+        with open(ruta_tmp, "wb") as f:
+            pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(ruta_tmp, ruta)
+
+    def _podar(self, nombre, ruta_vigente):
+        """Borra los resultados de la etapa con otras llaves (sólo se guarda el último)."""
+        vigente = os.path.basename(ruta_vigente)
+        for archivo in os.listdir(self.directorio):
+            if archivo.startswith(f"{nombre}-") and archivo.endswith(".pkl") and archivo != vigente:
+                os.remove(os.path.join(self.directorio, archivo))
+
+    def etapa(self, nombre, funcion, *args, dependencias=(), modulos=(), parametros=None,
+              filas_entrada=None, cache=True, salidas=()):
+        """
+        Ejecuta funcion(*args) o lee su resultado de la caché. `dependencias`
+        son las llaves de las etapas previas y `modulos` los módulos cuyo
+        código usa la etapa; `salidas` son los archivos que escribe (hay
+        acierto sólo si existen con esta misma llave). Regresa (resultado, llave).
+        """
+        codigo = [_codigo(funcion)] + [_codigo(m) for m in modulos]
+        clave = calcular_clave(nombre, codigo, parametros or {}, list(dependencias))
+        ruta = self._ruta(nombre, clave)
+
+        _reiniciar_pico_rss()
+        rss_inicio = _rss_mb()
+        inicio = time.perf_counter()
+        acierto = (
+            cache and not self.forzar and os.path.exists(ruta) and _salidas_vigentes(salidas, clave)
+        )
+        if acierto:
+            resultado = self._leer(ruta)
+        else:
+            for salida in salidas:
+                if os.path.exists(_ruta_clave(salida)):
+                    os.remove(_ruta_clave(salida))
+            resultado = funcion(*args)
+            for salida in salidas:
+                with open(_ruta_clave(salida), "w", encoding="utf-8") as f:
+                    f.write(clave + "\n")
+            if cache:
+                self._guardar(ruta, resultado)
+                self._podar(nombre, ruta)
+        segundos = time.perf_counter() - inicio
+
+        self.etapas.append(
+            {
+                "etapa": nombre,
+                "clave": clave,
+                "cache": "acierto" if acierto else ("fallo" if cache else "sin_cache"),
+                "segundos": round(segundos, 3),
+                "filas_entrada": filas_entrada,
+                "filas_salida": _filas(resultado),
+                "memoria_inicio_mb": None if rss_inicio is None else round(rss_inicio, 1),
+                "memoria_pico_mb": round(_pico_rss_mb(), 1),
+            }
+        )
+        return resultado, clave
+
+
+def _filas(resultado):
+    """Filas de salida de una etapa (None si no aplica)."""
+    if isinstance(resultado, pd.DataFrame):
+        return int(len(resultado))
+    if isinstance(resultado, dict):
+        if isinstance(resultado.get("data"), pd.DataFrame):
+            return int(len(resultado["data"]))
+        return resultado.get("filas")
+    if isinstance(resultado, (list, tuple)):
+        return len(resultado)
+    return None
+
+
+# ============================================
+# ETAPAS
+# ============================================
+
+
+def etapa_muestra(archivos, porcentaje, semilla):
+    """Muestra aleatoria reproducible de archivos (celda 2 del notebook)."""
+    tam = max(1, int(len(archivos) * porcentaje))
+    random.seed(semilla)
+    return random.sample(archivos, tam)
+
+
+def etapa_ingesta(muestra, motor):
+    """Lectura de declaraciones; los errores se guardan junto con las filas."""
+    filas, errores = leer_archivos(muestra, motor=motor)
+    return {"data": pd.DataFrame(filas), "errores": errores}
+
+
+def etapa_features(df):
+    """Limpieza de numéricas y features derivadas."""
+    return construir_features(df)
+
+
+def etapa_reglas(data):
+    """Percentiles y reglas R1–R10."""
+    data = data.copy()
+    percentiles = calcular_percentiles(data)
+    aplicar_reglas(data, **percentiles)
+    return {"data": data, "percentiles": percentiles}
+
+
+def etapa_modelo(data, percentiles, parametros_modelo):
+    """Ajuste de IsolationForest y scores 0–100 / niveles."""
+    data = data.copy()
+    modelo, raw_scores = ModeloRiesgo.ajustar(data, percentiles, **parametros_modelo)
+    modelo.asignar_scores(data, raw_scores)
+    return {"data": data, "modelo": modelo}
+
+
+def etapa_exportar(data, modelo, ruta_csv, ruta_modelo, dir_particiones):
+    """CSV de resultados, modelo ajustado y, opcionalmente, dataset particionado."""
+    data.to_csv(ruta_csv, index=False)
+    modelo.guardar(ruta_modelo)
+    if dir_particiones:
+        exportar_particionado(data, dir_particiones)
+    return {
+        "ruta_csv": ruta_csv,
+        "ruta_modelo": ruta_modelo,
+        "dir_particiones": dir_particiones,
+        "filas": int(len(data)),
+    }
+
+
+def etapa_explicaciones(data, modelo, ruta):
+    """Top contribuciones por feature de riesgo_modelo (explicaciones.py)."""
+    indices, pesos = calcular_explicaciones(modelo, data)
+    guardar_explicaciones(ruta, data["id"], indices, pesos)
+    return {"ruta": ruta, "filas": int(len(indices))}
+
+
+def construir_metadatos(data, percentiles, porcentaje):
+    """Campos de metadatos_analisis.json que lee el dashboard."""
+    total = int(len(data))
+    dist = data["riesgo_nivel"].value_counts()
+    return {
+        "fecha_analisis": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total_declaraciones": total,
+        "porcentaje_muestra": porcentaje,
+        "num_features": len(FEATURES),
+        "columnas_entrada_modelo": FEATURES,
+        "umbral_ingresos_altos": percentiles["p90_ingreso"],
+        "distribucion_riesgo": {n: int(dist.get(n, 0)) for n in ["Alto", "Medio", "Bajo"]},
+        "cobertura_patrimonial": float((data["patrimonio_bruto"] > 0).mean()) if total else 0.0,
+        "version": VERSION,
+        "tipo": "datos_reales_recalculados",
+    }
+
+
+# ============================================
+# EJECUCIÓN
+# ============================================
+
+
+def ejecutar(ruta_base, porcentaje=0.10, semilla=42, motor="stdlib",
+             salida_csv="resultados_anticorrupcion.csv", ruta_modelo="modelo_riesgo.joblib",
+             dir_particiones=None,
+             ruta_explicaciones="explicaciones_riesgo.npz",
+             ruta_metadatos="metadatos_analisis.json", directorio_cache=".cache_pipeline",
+             forzar=False, parametros_modelo=None):
+    """Corre el pipeline completo y regresa los metadatos escritos."""
+    inicio = time.perf_counter()
+    p = PipelineCache(directorio_cache, forzar=forzar)
+    parametros_modelo = parametros_modelo or {}
+
+    # 1. Descubrimiento de archivos: la huella (tamaño + mtime) es la llave de todo lo demás
+    archivos = sorted(glob.glob(ruta_base, recursive=True))
+    huella = huella_archivos(archivos)
+    p.etapas.append(
+        {"etapa": "archivos", "clave": huella, "cache": "sin_cache", "segundos": None,
+         "filas_entrada": None, "filas_salida": len(archivos),
+         "memoria_inicio_mb": None, "memoria_pico_mb": None}
+    )
+
+    muestra, k_muestra = p.etapa(
+        "muestra", etapa_muestra, archivos, porcentaje, semilla,
+        dependencias=[huella], parametros={"porcentaje": porcentaje, "semilla": semilla},
+        filas_entrada=len(archivos), cache=False,
+    )
+
+    # fila_desde_declaracion (ingesta) y el resto de las etapas viven en puntuacion.py
+    ingesta, k_ingesta = p.etapa(
+        "ingesta", etapa_ingesta, muestra, motor,
+        dependencias=[k_muestra], modulos=[lector_pdn, puntuacion],
+        parametros={"motor": motor}, filas_entrada=len(muestra),
+    )
+    features, k_features = p.etapa(
+        "features", etapa_features, ingesta["data"],
+        dependencias=[k_ingesta], modulos=[puntuacion], filas_entrada=len(ingesta["data"]),
+    )
+    reglas, k_reglas = p.etapa(
+        "reglas", etapa_reglas, features,
+        dependencias=[k_features], modulos=[puntuacion],
+        parametros={"umbrales": UMBRALES_REGLAS}, filas_entrada=len(features),
+    )
+    modelo, k_modelo = p.etapa(
+        "modelo", etapa_modelo, reglas["data"], reglas["percentiles"], parametros_modelo,
+        dependencias=[k_reglas], modulos=[puntuacion],
+        parametros={**PARAMETROS_MODELO, **parametros_modelo}, filas_entrada=len(reglas["data"]),
+    )
+    data = modelo["data"]
+
+    # Las etapas que escriben archivos se repiten si una salida falta o es de otra llave
+    salidas = [salida_csv, ruta_modelo]
+    if dir_particiones:
+        salidas.append(os.path.join(dir_particiones, "manifiesto.json"))
+    p.etapa(
+        "exportar", etapa_exportar, data, modelo["modelo"], salida_csv, ruta_modelo, dir_particiones,
+        dependencias=[k_modelo], modulos=[particiones, simulador],
+        parametros={"csv": salida_csv, "modelo": ruta_modelo, "particiones": dir_particiones},
+        filas_entrada=len(data), salidas=salidas,
+    )
+
+    if ruta_explicaciones:
+        p.etapa(
+            "explicaciones", etapa_explicaciones, data, modelo["modelo"], ruta_explicaciones,
+            dependencias=[k_modelo], modulos=[explicaciones, puntuacion],
+            parametros={"ruta": ruta_explicaciones},
+            filas_entrada=len(data), salidas=[ruta_explicaciones],
+        )
+
+    metadatos = construir_metadatos(data, reglas["percentiles"], porcentaje)
+    metadatos["errores_lectura"] = len(ingesta["errores"])
+    metadatos["ejecucion"] = {
+        "segundos_total": round(time.perf_counter() - inicio, 3),
+        "etapas": p.etapas,
+    }
+    with open(ruta_metadatos, "w", encoding="utf-8") as f:
+        json.dump(metadatos, f, ensure_ascii=False, indent=2)
+    return metadatos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de análisis con caché por etapa")
+    parser.add_argument("--ruta-base", required=True,
+                        help='Patrón glob de los JSON PDN S1 (ej. "PDN_S1/**/*.json")')
+    parser.add_argument("--porcentaje", type=float, default=0.10)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--motor", choices=["stdlib", "ijson"], default="stdlib")
+    parser.add_argument("--salida", default="resultados_anticorrupcion.csv")
+    parser.add_argument("--modelo", default="modelo_riesgo.joblib",
+                        help="Archivo del modelo ajustado (lo usa explicaciones.py)")
+    parser.add_argument("--particiones", default=None,
+                        help="Directorio para el dataset particionado (opcional)")
+    parser.add_argument("--explicaciones", default="explicaciones_riesgo.npz",
+                        help="Archivo de explicaciones de riesgo_modelo ('' para omitir)")
+    parser.add_argument("--metadatos", default="metadatos_analisis.json")
+    parser.add_argument("--cache", default=".cache_pipeline")
+    parser.add_argument("--forzar", action="store_true", help="Ignora la caché")
+    args = parser.parse_args()
+
+    metadatos = ejecutar(
+        args.ruta_base,
+        porcentaje=args.porcentaje,
+        semilla=args.semilla,
+        motor=args.motor,
+        salida_csv=args.salida,
+        ruta_modelo=args.modelo,
+        dir_particiones=args.particiones,
+        ruta_explicaciones=args.explicaciones,
+        ruta_metadatos=args.metadatos,
+        directorio_cache=args.cache,
+        forzar=args.forzar,
+    )
+
+    print(f"{'etapa':<14}{'caché':>11}{'segundos':>10}{'entrada':>10}{'salida':>10}{'pico MiB':>10}")
+    for e in metadatos["ejecucion"]["etapas"]:
+        print(
+            f"{e['etapa']:<14}{e['cache']:>11}{e['segundos'] if e['segundos'] is not None else '-':>10}"
+            f"{e['filas_entrada'] if e['filas_entrada'] is not None else '-':>10}"
+            f"{e['filas_salida'] if e['filas_salida'] is not None else '-':>10}"
+            f"{e['memoria_pico_mb'] if e['memoria_pico_mb'] is not None else '-':>10}"
+        )
+    print("Metadatos:", args.metadatos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+PUNTUACIÓN DE RIESGO - PatrimonIA
+Lógica de features, reglas R1–R10 e IsolationForest extraída del notebook
+Analisis_Codifikados.ipynb para poder reutilizarla fuera de Colab.
+
+Uso típico:
+    modelo = ModeloRiesgo.entrenar(data)     # data con las columnas base
+    resultado = modelo.puntuar(nuevas_filas)
+"""
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+# ============================================
+# COLUMNAS Y PARÁMETROS DEL MODELO
+# ============================================
+
+COLUMNAS_INGRESOS = [
+    "ingreso_cargo",
+    "ingreso_industrial",
+    "ingreso_financiero",
+    "ingreso_profesional",
+    "ingreso_enajenacion",
+    "otros_ingresos",
+]
+
+COLUMNAS_PATRIMONIO = [
+    "inmuebles_total",
+    "vehiculos_total",
+    "muebles_total",
+]
+
+COLUMNAS_NUMERICAS = COLUMNAS_INGRESOS + COLUMNAS_PATRIMONIO + ["adeudos_total"]
+
+LISTA_REGLAS = [
+    "R1_otros_ingresos_moderados",
+    "R2_inconsistencia_menor",
+    "R3_otros_ingresos_alto",
+    "R4_alto_ingreso_sin_patrimonio",
+    "R5_inconsistencia_grave",
+    "R6_patrimonio_fragmentado",
+    "R7_solo_pasivos",
+    "R8_rendimientos_imposibles",
+    "R9_outlier_extremo",
+    "R10_ratio_anormal",
+]
+
+FEATURES = [
+    "total_ingresos",
+    "patrimonio_bruto",
+    "ingreso_cargo",
+    "otros_ingresos",
+    "prop_otros_ingresos",
+    "inmuebles_total",
+    "vehiculos_total",
+    "muebles_total",
+    "adeudos_total",
+    "score_reglas",
+]
+
+# Umbrales de las reglas R1–R10 (mismos valores que el notebook)
+UMBRALES_REGLAS = {
+    "prop_moderada_min": 0.10,  # R1
+    "prop_moderada_max": 0.30,  # R1
+    "prop_alta": 0.50,  # R3
+    "percentil_alto_ingreso": 0.90,  # R4 (P90 de total_ingresos)
+    "percentil_outlier": 0.99,  # R9 (P99 de total_ingresos)
+    "patrimonio_alto": 100000,  # R8
+    "ratio_deuda": 3,  # R10
+}
+
+# Niveles de riesgo sobre 'riesgo_modelo' (mismos cortes que el notebook)
+BINS_NIVEL = [0, 50, 80, 101]
+ETIQUETAS_NIVEL = ["Bajo", "Medio", "Alto"]
+
+# Umbral de la bandera binaria de anomalía
+UMBRAL_ANOMALIA = 80
+
+PARAMETROS_MODELO = {
+    "n_estimators": 300,
+    "contamination": 0.05,
+    "random_state": 42,
+}
+
+
+# ============================================
+# EXTRACCIÓN DESDE JSON PDN S1
+# ============================================
+
+
+def valor(obj):
+    """Extrae obj['valor'] si existe, si no regresa NaN."""
+    if isinstance(obj, dict):
+        return obj.get("valor", np.nan)
+    return np.nan
+
+
+def remuneracion(obj):
+    """Extrae remuneracionTotal['valor'] si existe."""
+    if isinstance(obj, dict):
+        r = obj.get("remuneracionTotal")
+        if isinstance(r, dict):
+            return r.get("valor", np.nan)
+    return np.nan
+
+
+def _dict(obj):
+    """obj si es un dict; si no (None, lista, número...), un dict vacío."""
+    return obj if isinstance(obj, dict) else {}
+
+
+def _es_dec(elemento):
+    """True si alguno de los titulares del elemento tiene la clave DEC."""
+    titulares = _dict(elemento).get("titular")
+    if not isinstance(titulares, list):
+        return False
+    return any(_dict(t).get("clave") == "DEC" for t in titulares)
+
+
+def sumar_bienes(lista):
+    """Suma bienes donde el titular es DEC."""
+    if not isinstance(lista, list):
+        return np.nan
+    total = 0
+    for b in lista:
+        if not _es_dec(b):
+            continue
+        v = _dict(b.get("valorAdquisicion")).get("valor")
+        if isinstance(v, (int, float)):
+            total += v
+    return total if total > 0 else np.nan
+
+
+def sumar_adeudos(lista):
+    """Suma adeudos del declarante."""
+    if not isinstance(lista, list):
+        return np.nan
+    total = 0
+    for a in lista:
+        if not _es_dec(a):
+            continue
+        v = _dict(a.get("montoOriginal")).get("valor")
+        if isinstance(v, (int, float)):
+            total += v
+    return total if total > 0 else np.nan
+
+
+def fila_desde_declaracion(d):
+    """
+    Convierte una declaración PDN S1 (dict) en la fila compacta del notebook.
+    Las secciones ausentes o en null se tratan como vacías.
+    """
+    if not isinstance(d, dict):
+        raise TypeError(f"Se esperaba un objeto JSON, no {type(d).__name__}")
+    metadata = _dict(d.get("metadata"))
+    sp = _dict(_dict(d.get("declaracion")).get("situacionPatrimonial"))
+    generales = _dict(sp.get("datosGenerales"))
+    empleo = _dict(sp.get("datosEmpleoCargoComision"))
+    ingresos = _dict(sp.get("ingresos"))
+
+    return {
+        # Datos generales de la declaración
+        "id": d.get("id"),
+        "anio": d.get("anioEjercicio"),
+        "tipo": metadata.get("tipo"),
+        "institucion": metadata.get("institucion"),
+        # Identidad del declarante
+        "nombre": generales.get("nombre"),
+        "primerApellido": generales.get("primerApellido"),
+        "segundoApellido": generales.get("segundoApellido"),
+        # Información sobre el puesto
+        "cargo": empleo.get("empleoCargoComision"),
+        "nivelGobierno": empleo.get("nivelOrdenGobierno"),
+        "ente": empleo.get("nombreEntePublico"),
+        # Ingresos del declarante
+        "ingreso_cargo": valor(ingresos.get("remuneracionAnualCargoPublico")),
+        "ingreso_neto": valor(ingresos.get("ingresoAnualNetoDeclarante")),
+        "ingreso_industrial": remuneracion(ingresos.get("actividadIndustrialComercialEmpresarial")),
+        "ingreso_financiero": remuneracion(ingresos.get("actividadFinanciera")),
+        "ingreso_profesional": remuneracion(ingresos.get("serviciosProfesionales")),
+        "ingreso_enajenacion": remuneracion(ingresos.get("enajenacionBienes")),
+        "otros_ingresos": remuneracion(ingresos.get("otrosIngresos")),
+        # Patrimonio del declarante
+        "inmuebles_total": sumar_bienes(_dict(sp.get("bienesInmuebles")).get("bienInmueble")),
+        "vehiculos_total": sumar_bienes(_dict(sp.get("vehiculos")).get("vehiculo")),
+        "muebles_total": sumar_bienes(_dict(sp.get("bienesMuebles")).get("bienMueble")),
+        # Adeudos del declarante
+        "adeudos_total": sumar_adeudos(_dict(sp.get("adeudos")).get("adeudo")),
+    }
+
+
+# ============================================
+# FEATURES Y REGLAS
+# ============================================
+
+
+def construir_features(df):
+    """
+    Limpia las columnas numéricas y calcula total_ingresos, patrimonio_bruto
+    y prop_otros_ingresos. Regresa una copia.
+    """
+    data = df.copy()
+
+    for col in COLUMNAS_NUMERICAS:
+        if col not in data.columns:
+            data[col] = 0
+        data[col] = pd.to_numeric(data[col], errors="coerce").fillna(0)
+
+    data["total_ingresos"] = data[COLUMNAS_INGRESOS].sum(axis=1)
+    data["patrimonio_bruto"] = data[COLUMNAS_PATRIMONIO].sum(axis=1)
+
+    # Vectorizado: evita dividir entre 0 sin recorrer fila por fila
+    total = data["total_ingresos"].to_numpy()
+    otros = data["otros_ingresos"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        data["prop_otros_ingresos"] = np.where(total > 0, otros / total, 0.0)
+
+    return data
+
+
+def calcular_percentiles(data, umbrales=UMBRALES_REGLAS):
+    """Percentiles P90 y P99 de total_ingresos usados por R4 y R9."""
+    return {
+        "p90_ingreso": float(data["total_ingresos"].quantile(umbrales["percentil_alto_ingreso"])),
+        "p99_ingreso": float(data["total_ingresos"].quantile(umbrales["percentil_outlier"])),
+    }
+
+
+def evaluar_reglas(c, p90_ingreso, p99_ingreso, umbrales=UMBRALES_REGLAS):
+    """
+    Evalúa R1–R10 sobre columnas (DataFrame o dict de arreglos numpy) y
+    regresa {regla: máscara booleana}.
+    """
+    prop = c["prop_otros_ingresos"]
+    total = c["total_ingresos"]
+    patrimonio = c["patrimonio_bruto"]
+    adeudos = c["adeudos_total"]
+    u = umbrales
+
+    return {
+        # R1 – Otros ingresos moderados (10% a 30%)
+        "R1_otros_ingresos_moderados": (prop >= u["prop_moderada_min"]) & (prop < u["prop_moderada_max"]),
+        # R2 – Inconsistencia menor: ingreso pero patrimonio cero
+        "R2_inconsistencia_menor": (c["ingreso_cargo"] > 0) & (patrimonio == 0),
+        # R3 – Otros ingresos altos (>= 50%)
+        "R3_otros_ingresos_alto": prop >= u["prop_alta"],
+        # R4 – Alto ingreso con patrimonio cero (> P90)
+        "R4_alto_ingreso_sin_patrimonio": (total >= p90_ingreso) & (patrimonio == 0),
+        # R5 – Inconsistencia grave: patrimonio negativo
+        "R5_inconsistencia_grave": patrimonio < 0,
+        # R6 – Patrimonio fragmentado: tiene todos los tipos + adeudos
+        "R6_patrimonio_fragmentado": (
+            (c["inmuebles_total"] > 0)
+            & (c["vehiculos_total"] > 0)
+            & (c["muebles_total"] > 0)
+            & (adeudos > 0)
+        ),
+        # R7 – Solo pasivos
+        "R7_solo_pasivos": (patrimonio == 0) & (adeudos > 0),
+        # R8 – Rendimientos imposibles: ingreso 0 pero tiene patrimonio alto
+        "R8_rendimientos_imposibles": (total == 0) & (patrimonio > u["patrimonio_alto"]),
+        # R9 – Outlier extremo: total_ingresos > P99
+        "R9_outlier_extremo": total >= p99_ingreso,
+        # R10 – Ratio anormal: deuda > patrimonio * 3
+        "R10_ratio_anormal": adeudos > patrimonio * u["ratio_deuda"],
+    }
+
+
+def aplicar_reglas(data, p90_ingreso, p99_ingreso, umbrales=UMBRALES_REGLAS):
+    """Agrega las columnas R1–R10 y score_reglas (modifica data en sitio)."""
+    for regla, mascara in evaluar_reglas(data, p90_ingreso, p99_ingreso, umbrales).items():
+        data[regla] = mascara.astype(int)
+
+    data["score_reglas"] = data[LISTA_REGLAS].sum(axis=1)
+    return data
+
+
+def nivel_riesgo(riesgo_modelo):
+    """Categoriza riesgo_modelo en Bajo / Medio / Alto."""
+    return pd.cut(
+        riesgo_modelo,
+        bins=BINS_NIVEL,
+        labels=ETIQUETAS_NIVEL,
+        right=False,
+        include_lowest=True,
+    )
+
+
+# ============================================
+# MODELO
+# ============================================
+
+
+def crear_pipeline(**parametros):
+    """Pipeline imputación + escalado + IsolationForest del notebook."""
+    params = {**PARAMETROS_MODELO, **parametros}
+    return Pipeline(
+        [
+            ("imputer", SimpleImputer(strategy="median")),
+            ("scaler", StandardScaler()),
+            ("model", IsolationForest(**params)),
+        ]
+    )
+
+
+def scores_crudos(pipeline, X):
+    """
+    Scores crudos (más alto = más anómalo) como en el notebook: el pipeline se
+    ajusta con imputación y escalado, pero se puntúa con
+    named_steps['model'].decision_function sobre X sin transformar.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    return -pipeline.named_steps["model"].decision_function(X)
+
+
+class ModeloRiesgo:
+    """
+    Estado ajustado del análisis: percentiles de las reglas, pipeline de
+    IsolationForest y rango de scores crudos para la normalización 0–100.
+    """
+
+    def __init__(self, pipeline, percentiles, min_score, max_score):
+        self.pipeline = pipeline
+        self.percentiles = percentiles
+        self.min_score = min_score
+        self.max_score = max_score
+
+    @classmethod
+    def ajustar(cls, data, percentiles, **parametros):
+        """
+        Ajusta el modelo sobre data con features y reglas ya calculadas.
+        Regresa (modelo, raw_scores del entrenamiento).
+        """
+        pipeline = crear_pipeline(**parametros)
+        X = data[FEATURES]
+        pipeline.fit(X)
+
+        raw_scores = scores_crudos(pipeline, X)
+        modelo = cls(pipeline, percentiles, float(raw_scores.min()), float(raw_scores.max()))
+        return modelo, raw_scores
+
+    @classmethod
+    def entrenar(cls, df, **parametros):
+        """Ajusta percentiles y modelo sobre un DataFrame con las columnas base."""
+        data = construir_features(df)
+        percentiles = calcular_percentiles(data)
+        aplicar_reglas(data, **percentiles)
+        return cls.ajustar(data, percentiles, **parametros)[0]
+
+    def guardar(self, ruta):
+        """Guarda el modelo ajustado (joblib) para puntuar o explicar después."""
+        joblib.dump(self, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee un modelo escrito con guardar."""
+        modelo = joblib.load(ruta)
+        if not isinstance(modelo, cls):
+            raise TypeError(f"{ruta} no contiene un ModeloRiesgo")
+        return modelo
+
+    def normalizar(self, raw_scores):
+        """Escala scores crudos a 0–100 con el rango del entrenamiento."""
+        rango = self.max_score - self.min_score
+        if rango <= 0:
+            return np.zeros_like(raw_scores)
+        return np.clip(100 * (raw_scores - self.min_score) / rango, 0, 100)
+
+    def asignar_scores(self, data, raw_scores):
+        """Agrega riesgo_modelo, anomaly_iforest y riesgo_nivel (en sitio)."""
+        data["riesgo_modelo"] = self.normalizar(raw_scores).round(2)
+        data["anomaly_iforest"] = (data["riesgo_modelo"] >= UMBRAL_ANOMALIA).astype(int)
+        data["riesgo_nivel"] = nivel_riesgo(data["riesgo_modelo"]).astype(str)
+        return data
+
+    def puntuar_features(self, data):
+        """Puntúa (en sitio) un DataFrame que ya tiene features y reglas."""
+        if len(data) == 0:
+            data["riesgo_modelo"] = pd.Series(dtype=float)
+            data["anomaly_iforest"] = pd.Series(dtype=int)
+            data["riesgo_nivel"] = pd.Series(dtype=object)
+            return data
+
+        raw_scores = scores_crudos(self.pipeline, data[FEATURES])
+        return self.asignar_scores(data, raw_scores)
+
+    def puntuar(self, df):
+        """
+        Calcula features, reglas, riesgo_modelo, anomaly_iforest y riesgo_nivel
+        para un lote de filas. Regresa un DataFrame nuevo.
+        """
+        data = construir_features(df)
+        aplicar_reglas(data, **self.percentiles)
+        return self.puntuar_features(data)
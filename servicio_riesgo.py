@@ -0,0 +1,276 @@
+"""
+SERVICIO LOCAL DE PUNTUACIÓN - PatrimonIA
+Servicio HTTP que carga una sola vez las features, reglas R1–R10 y el
+pipeline de IsolationForest, y puntúa declaraciones bajo demanda. El
+modelo es el que guardó pipeline.py (--modelo), así que los scores usan el
+mismo bosque y rango min/max que produjeron riesgo_modelo en el CSV.
+
+Las peticiones concurrentes se juntan en micro-lotes: un hilo de trabajo
+espera hasta `espera_ms` (o hasta juntar `max_filas`) y puntúa todas las
+filas pendientes en una sola llamada vectorizada.
+
+Para ejecutar:
+python servicio_riesgo.py --modelo modelo_riesgo.joblib --puerto 8080
+
+Endpoints:
+GET  /salud     -> estado del servicio
+POST /puntuar   -> cuerpo JSON con una de estas formas:
+                   [ {declaración PDN S1}, ... ]
+                   {"declaraciones": [ ... ]}
+                   {"filas": [ {columnas base o features}, ... ]}
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from puntuacion import ModeloRiesgo, fila_desde_declaracion
+
+CAMPOS_RESPUESTA = ["id", "score_reglas", "riesgo_modelo", "riesgo_nivel"]
+
+
+# ============================================
+# MICRO-LOTES
+# ============================================
+
+
+class _Pendiente:
+    """Petición en espera de ser puntuada dentro de un micro-lote."""
+
+    __slots__ = ("filas", "evento", "resultado", "error")
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class MicroLotes:
+    """
+    Agrupa peticiones concurrentes y las puntúa juntas con el modelo.
+    `puntuar(df)` bloquea al llamador hasta que su lote termina.
+    """
+
+    def __init__(self, modelo, max_filas=4096, espera_ms=5):
+        self.modelo = modelo
+        self.max_filas = max_filas
+        self.espera = espera_ms / 1000
+        self._cola = queue.Queue()
+        self._activo = True
+        self.lotes = 0
+        self._hilo = threading.Thread(target=self._trabajar, daemon=True)
+        self._hilo.start()
+
+    def puntuar(self, df):
+        """Encola un DataFrame y espera el resultado de su micro-lote."""
+        pendiente = _Pendiente(df)
+        self._cola.put(pendiente)
+        pendiente.evento.wait()
+        if pendiente.error is not None:
+            raise pendiente.error
+        return pendiente.resultado
+
+    def cerrar(self):
+        """Detiene el hilo de trabajo."""
+        self._activo = False
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _juntar(self, primero):
+        """Junta peticiones hasta llenar el lote o agotar la ventana de espera."""
+        lote = [primero]
+        filas = len(primero.filas)
+        limite = time.perf_counter() + self.espera
+        while filas < self.max_filas:
+            restante = limite - time.perf_counter()
+            try:
+                siguiente = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if siguiente is None:
+                self._activo = False
+                break
+            lote.append(siguiente)
+            filas += len(siguiente.filas)
+        return lote
+
+    def _trabajar(self):
+        while self._activo:
+            primero = self._cola.get()
+            if primero is None:
+                break
+            lote = self._juntar(primero)
+            try:
+                combinado = pd.concat([p.filas for p in lote], ignore_index=True)
+                puntuado = self.modelo.puntuar(combinado)
+                inicio = 0
+                for p in lote:
+                    fin = inicio + len(p.filas)
+                    p.resultado = puntuado.iloc[inicio:fin]
+                    inicio = fin
+            except Exception as e:
+                for p in lote:
+                    p.error = e
+            self.lotes += 1
+            for p in lote:
+                p.evento.set()
+
+
+# ============================================
+# HTTP
+# ============================================
+
+
+def filas_desde_cuerpo(cuerpo):
+    """Convierte el cuerpo JSON de /puntuar en un DataFrame de filas base."""
+    if isinstance(cuerpo, list):
+        declaraciones, filas = cuerpo, None
+    elif isinstance(cuerpo, dict):
+        declaraciones, filas = cuerpo.get("declaraciones"), cuerpo.get("filas")
+    else:
+        raise ValueError("El cuerpo debe ser una lista o un objeto JSON")
+
+    if filas is not None:
+        if not isinstance(filas, list):
+            raise ValueError("'filas' debe ser una lista")
+        for i, f in enumerate(filas):
+            if not isinstance(f, dict):
+                raise ValueError(f"filas[{i}] debe ser un objeto JSON")
+        return pd.DataFrame(filas)
+    if declaraciones is not None:
+        if not isinstance(declaraciones, list):
+            raise ValueError("'declaraciones' debe ser una lista")
+        convertidas = []
+        for i, d in enumerate(declaraciones):
+            try:
+                convertidas.append(fila_desde_declaracion(d))
+            except Exception as e:
+                raise ValueError(f"declaraciones[{i}]: {e}") from e
+        return pd.DataFrame(convertidas)
+    raise ValueError("Se esperaba 'declaraciones' o 'filas'")
+
+
+def respuesta_desde_resultado(resultado):
+    """Lista de dicts con los campos de score que muestra el dashboard."""
+    cols = [c for c in CAMPOS_RESPUESTA if c in resultado.columns]
+    salida = resultado[cols].replace({np.nan: None})
+    return salida.to_dict("records")
+
+
+class ManejadorRiesgo(BaseHTTPRequestHandler):
+    """Handler HTTP; el servidor debe tener el atributo `micro_lotes`."""
+
+    def log_message(self, format, *args):
+        # Silenciamos el log por petición (afecta el throughput)
+        pass
+
+    def _responder(self, codigo, datos):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        if self.path == "/salud":
+            self._responder(200, {"estado": "ok", "lotes": self.server.micro_lotes.lotes})
+        else:
+            self._responder(404, {"error": "Ruta no encontrada"})
+
+    def do_POST(self):
+        if self.path != "/puntuar":
+            self._responder(404, {"error": "Ruta no encontrada"})
+            return
+        try:
+            largo = int(self.headers.get("Content-Length", 0))
+            cuerpo = json.loads(self.rfile.read(largo) or b"null")
+            filas = filas_desde_cuerpo(cuerpo)
+        except (ValueError, TypeError) as e:
+            self._responder(400, {"error": str(e)})
+            return
+
+        # len y no .empty: [{}] da una fila sin columnas y también se puntúa
+        if len(filas) == 0:
+            self._responder(200, {"resultados": []})
+            return
+
+        try:
+            resultado = self.server.micro_lotes.puntuar(filas)
+        except Exception as e:
+            self._responder(500, {"error": str(e)})
+            return
+        self._responder(200, {"resultados": respuesta_desde_resultado(resultado)})
+
+
+class ServidorRiesgo(ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexión y un modelo compartido."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, direccion, modelo, max_filas=4096, espera_ms=5):
+        super().__init__(direccion, ManejadorRiesgo)
+        self.micro_lotes = MicroLotes(modelo, max_filas=max_filas, espera_ms=espera_ms)
+
+    def server_close(self):
+        super().server_close()
+        self.micro_lotes.cerrar()
+
+
+def cargar_modelo(ruta_modelo=None, ruta_datos=None):
+    """
+    Modelo guardado por pipeline.py; si no se da ruta_modelo, lo entrena con
+    ruta_datos (CSV de resultados o cualquier CSV con columnas base).
+    """
+    if ruta_modelo:
+        return ModeloRiesgo.cargar(ruta_modelo)
+    if not ruta_datos:
+        raise ValueError("Se necesita --modelo o --datos")
+    df = pd.read_csv(ruta_datos, low_memory=False)
+    return ModeloRiesgo.entrenar(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de puntuación de riesgo")
+    origen = parser.add_mutually_exclusive_group()
+    origen.add_argument("--modelo", default="modelo_riesgo.joblib",
+                        help="Modelo ajustado que guardó pipeline.py")
+    origen.add_argument("--datos", default=None,
+                        help="CSV para re-entrenar percentiles y modelo (en lugar de --modelo)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--max-filas", type=int, default=4096,
+                        help="Máximo de filas por micro-lote")
+    parser.add_argument("--espera-ms", type=float, default=5,
+                        help="Ventana para juntar peticiones en un micro-lote")
+    args = parser.parse_args()
+
+    if args.datos:
+        print("Entrenando modelo con:", args.datos)
+        modelo = cargar_modelo(ruta_datos=args.datos)
+    else:
+        print("Cargando modelo:", args.modelo)
+        modelo = cargar_modelo(ruta_modelo=args.modelo)
+
+    servidor = ServidorRiesgo(
+        (args.host, args.puerto), modelo, max_filas=args.max_filas, espera_ms=args.espera_ms
+    )
+    print(f"Servicio escuchando en http://{args.host}:{args.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
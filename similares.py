@@ -0,0 +1,114 @@
+"""
+DECLARACIONES SIMILARES - PatrimonIA
+Índice de vecinos más cercanos (KD-tree) sobre el perfil de ingresos y
+patrimonio, para comparar una declaración con sus pares.
+
+Los montos tienen colas muy largas, así que se transforman con log1p antes
+de estandarizar; sin eso casi todas las declaraciones quedan amontonadas
+cerca de 0 y los vecinos no dicen nada.
+
+La búsqueda se puede restringir al mismo nivelGobierno o a la misma
+institución; el árbol de cada grupo se construye la primera vez que se usa.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+COLUMNAS_SIMILITUD = [
+    "total_ingresos",
+    "patrimonio_bruto",
+    "inmuebles_total",
+    "vehiculos_total",
+    "muebles_total",
+    "adeudos_total",
+    "prop_otros_ingresos",
+]
+
+# Columnas sin log1p (ya son proporciones)
+_SIN_LOG = {"prop_otros_ingresos"}
+
+GRUPOS = ["nivelGobierno", "institucion"]
+
+TAM_HOJA = 40
+
+
+def matriz_estandarizada(df, columnas=COLUMNAS_SIMILITUD):
+    """Matriz (n × columnas) con log1p en montos y estandarizada por columna."""
+    bloques = []
+    for col in columnas:
+        if col in df.columns:
+            x = pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        else:
+            x = np.zeros(len(df))
+        if col not in _SIN_LOG:
+            x = np.sign(x) * np.log1p(np.abs(x))
+        bloques.append(x)
+    Z = np.column_stack(bloques) if bloques else np.empty((len(df), 0))
+    std = Z.std(axis=0)
+    std[std == 0] = 1.0
+    return (Z - Z.mean(axis=0)) / std
+
+
+class IndiceSimilares:
+    """KD-tree global y, bajo demanda, uno por grupo (nivelGobierno / institucion)."""
+
+    def __init__(self, df, tam_hoja=TAM_HOJA):
+        self.Z = matriz_estandarizada(df)
+        self.tam_hoja = tam_hoja
+        self.arbol = KDTree(self.Z, leaf_size=tam_hoja)
+
+        # Posiciones de cada grupo (para armar sus árboles sin volver a df)
+        self.codigos = {}
+        for grupo in GRUPOS:
+            if grupo in df.columns:
+                self.codigos[grupo] = pd.factorize(df[grupo].fillna("Sin dato"))[0]
+        self._arboles_grupo = {}
+
+    def _arbol_grupo(self, grupo, codigo):
+        """(árbol, posiciones) del grupo; se construye una sola vez."""
+        llave = (grupo, codigo)
+        if llave not in self._arboles_grupo:
+            posiciones = np.flatnonzero(self.codigos[grupo] == codigo)
+            arbol = KDTree(self.Z[posiciones], leaf_size=self.tam_hoja)
+            self._arboles_grupo[llave] = (arbol, posiciones)
+        return self._arboles_grupo[llave]
+
+    def vecinos(self, posicion, k=5, restringir=None):
+        """
+        Posiciones y distancias de las k declaraciones más parecidas a la de
+        `posicion` (sin incluirla). `restringir` puede ser None,
+        "nivelGobierno" o "institucion".
+        """
+        punto = self.Z[posicion:posicion + 1]
+        if restringir is not None and restringir in self.codigos:
+            arbol, posiciones = self._arbol_grupo(restringir, self.codigos[restringir][posicion])
+        else:
+            arbol, posiciones = self.arbol, None
+
+        k_consulta = min(k + 1, arbol.data.shape[0])
+        dist, idx = arbol.query(punto, k=k_consulta)
+        dist, idx = dist[0], idx[0]
+        if posiciones is not None:
+            idx = posiciones[idx]
+
+        fuera = idx != posicion
+        return idx[fuera][:k], dist[fuera][:k]
+
+
+def tabla_similares(df, indice, posicion, k=5, restringir=None, columnas=None):
+    """DataFrame con las k declaraciones similares y su distancia."""
+    idx, dist = indice.vecinos(posicion, k=k, restringir=restringir)
+    columnas = columnas or [
+        "nombre",
+        "primerApellido",
+        "institucion",
+        "nivelGobierno",
+        "total_ingresos",
+        "patrimonio_bruto",
+        "riesgo_modelo",
+        "riesgo_nivel",
+    ]
+    tabla = df.iloc[idx][[c for c in columnas if c in df.columns]].copy()
+    tabla["distancia"] = dist.round(3)
+    return tabla
@@ -0,0 +1,169 @@
+"""
+SIMULADOR DE UMBRALES - PatrimonIA
+Re-evalúa las reglas R1–R10 y los niveles de riesgo (Bajo / Medio / Alto)
+con umbrales distintos a los del notebook, sobre todo el dataset y en
+milisegundos.
+
+Los arreglos se preparan una sola vez (ordenados para los percentiles y los
+conteos por nivel con searchsorted); cada simulación sólo hace comparaciones
+vectorizadas y búsquedas binarias. Con guardar/cargar los arreglos viven en
+un .npz junto al dataset particionado, para no leer todas las particiones.
+
+Nota: cambiar los umbrales de las reglas cambia score_reglas, que también es
+entrada del IsolationForest; el simulador no re-entrena el modelo y usa el
+riesgo_modelo ya calculado para los niveles.
+"""
+
+import numpy as np
+import pandas as pd
+
+from puntuacion import BINS_NIVEL, ETIQUETAS_NIVEL, LISTA_REGLAS, UMBRALES_REGLAS, evaluar_reglas
+
+COLUMNAS_REGLAS = [
+    "prop_otros_ingresos",
+    "total_ingresos",
+    "patrimonio_bruto",
+    "adeudos_total",
+    "ingreso_cargo",
+    "inmuebles_total",
+    "vehiculos_total",
+    "muebles_total",
+]
+
+# Separación entre instituciones en la llave compuesta (riesgo_modelo está en 0–100)
+_ANCHO_GRUPO = 1000.0
+
+
+def _percentil_ordenado(ordenado, q):
+    """Percentil con interpolación lineal (como pandas) sobre un arreglo ya ordenado."""
+    if len(ordenado) == 0:
+        return np.nan
+    pos = q * (len(ordenado) - 1)
+    bajo = int(np.floor(pos))
+    alto = min(bajo + 1, len(ordenado) - 1)
+    return float(ordenado[bajo] + (ordenado[alto] - ordenado[bajo]) * (pos - bajo))
+
+
+class SimuladorUmbrales:
+    """Arreglos precalculados de un DataFrame de resultados para simular umbrales."""
+
+    # Arreglos que guarda/lee un .npz (las columnas van con prefijo "col_")
+    _ARREGLOS = ["total_ordenado", "riesgo_ordenado", "llave_ordenada"]
+
+    def __init__(self, df):
+        self.n = len(df)
+
+        # Columnas de las reglas como float64 (los nulos cuentan como 0, igual que el notebook)
+        self.columnas = {}
+        for col in COLUMNAS_REGLAS:
+            if col in df.columns:
+                valores = pd.to_numeric(df[col], errors="coerce").fillna(0)
+                self.columnas[col] = valores.to_numpy(dtype=np.float64)
+            else:
+                self.columnas[col] = np.zeros(self.n)
+        self.total_ordenado = np.sort(self.columnas["total_ingresos"])
+
+        # riesgo_modelo ordenado, global y por institución (llave compuesta)
+        if "riesgo_modelo" in df.columns:
+            riesgo = pd.to_numeric(df["riesgo_modelo"], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            riesgo = np.full(self.n, np.nan)
+        validos = ~np.isnan(riesgo)
+        self.riesgo_ordenado = np.sort(riesgo[validos])
+
+        if "institucion" in df.columns:
+            codigos, self.instituciones = pd.factorize(df["institucion"].fillna("Sin institución"))
+        else:
+            codigos, self.instituciones = np.zeros(self.n, dtype=np.int64), pd.Index(["Todas"])
+        self.llave_ordenada = np.sort(codigos[validos] * _ANCHO_GRUPO + riesgo[validos])
+        self._bases_grupo = np.arange(len(self.instituciones)) * _ANCHO_GRUPO
+
+    def guardar(self, ruta):
+        """Guarda los arreglos precalculados en un .npz."""
+        np.savez(
+            ruta,
+            instituciones=np.asarray(self.instituciones, dtype=str),
+            **{nombre: getattr(self, nombre) for nombre in self._ARREGLOS},
+            **{f"col_{col}": valores for col, valores in self.columnas.items()},
+        )
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Simulador desde un .npz de guardar, sin el DataFrame original."""
+        simulador = cls.__new__(cls)
+        with np.load(ruta) as z:
+            for nombre in cls._ARREGLOS:
+                setattr(simulador, nombre, z[nombre])
+            simulador.columnas = {col: z[f"col_{col}"] for col in COLUMNAS_REGLAS}
+            simulador.instituciones = pd.Index(z["instituciones"])
+        simulador.n = len(simulador.total_ordenado)
+        simulador._bases_grupo = np.arange(len(simulador.instituciones)) * _ANCHO_GRUPO
+        return simulador
+
+    # ----------------------------------------
+    # Niveles de riesgo
+    # ----------------------------------------
+
+    def _conteos_nivel(self, ordenado, bases, cortes):
+        """
+        Conteos Bajo / Medio / Alto con cortes [0, medio, alto, 101) y
+        right=False. `bases` desplaza cada grupo en la llave compuesta.
+        """
+        limites = [np.searchsorted(ordenado, bases + c, side="left") for c in cortes]
+        return np.diff(np.stack(limites), axis=0)
+
+    def niveles(self, corte_medio=BINS_NIVEL[1], corte_alto=BINS_NIVEL[2]):
+        """Conteos globales y por institución para los cortes dados."""
+        cortes = [BINS_NIVEL[0], corte_medio, corte_alto, BINS_NIVEL[-1]]
+        glob = self._conteos_nivel(self.riesgo_ordenado, np.zeros(1), cortes)[:, 0]
+        por_inst = self._conteos_nivel(self.llave_ordenada, self._bases_grupo, cortes)
+        return (
+            dict(zip(ETIQUETAS_NIVEL, glob.tolist())),
+            pd.DataFrame(por_inst.T, index=self.instituciones, columns=ETIQUETAS_NIVEL),
+        )
+
+    # ----------------------------------------
+    # Reglas
+    # ----------------------------------------
+
+    def reglas(self, umbrales=None):
+        """Activaciones por regla y distribución de score_reglas."""
+        u = {**UMBRALES_REGLAS, **(umbrales or {})}
+        p90 = _percentil_ordenado(self.total_ordenado, u["percentil_alto_ingreso"])
+        p99 = _percentil_ordenado(self.total_ordenado, u["percentil_outlier"])
+        mascaras = evaluar_reglas(self.columnas, p90, p99, u)
+
+        score = np.zeros(self.n, dtype=np.int8)
+        activaciones = {}
+        for regla in LISTA_REGLAS:
+            score += mascaras[regla]
+            activaciones[regla] = int(np.count_nonzero(mascaras[regla]))
+
+        return {
+            "p90_ingreso": p90,
+            "p99_ingreso": p99,
+            "activaciones": activaciones,
+            "distribucion_score_reglas": np.bincount(score, minlength=len(LISTA_REGLAS) + 1),
+        }
+
+    def simular(self, umbrales=None, corte_medio=BINS_NIVEL[1], corte_alto=BINS_NIVEL[2]):
+        """Reglas + niveles para un conjunto de umbrales."""
+        resultado = self.reglas(umbrales)
+        resultado["niveles"], resultado["por_institucion"] = self.niveles(corte_medio, corte_alto)
+        return resultado
+
+
+def comparar_instituciones(base, nuevo, n=15):
+    """Instituciones con mayor cambio absoluto en casos de riesgo Alto."""
+    tabla = pd.DataFrame(
+        {
+            "Alto actual": base["Alto"],
+            "Alto simulado": nuevo["Alto"],
+            "Medio actual": base["Medio"],
+            "Medio simulado": nuevo["Medio"],
+        }
+    )
+    tabla["Δ Alto"] = tabla["Alto simulado"] - tabla["Alto actual"]
+    tabla["Δ Medio"] = tabla["Medio simulado"] - tabla["Medio actual"]
+    orden = (tabla["Δ Alto"].abs() + tabla["Δ Medio"].abs()).sort_values(ascending=False)
+    return tabla.loc[orden.index[:n]]
@@ -0,0 +1,56 @@
+"""
+Pruebas del barrido de parámetros: matrices por conjunto de features y
+scores con la misma semántica que puntuacion.ModeloRiesgo (ajuste sobre la
+matriz escalada, decision_function sobre la cruda).
+
+Para ejecutar (desde la raíz del repositorio):
+pytest -q tests
+"""
+
+import numpy as np
+import pytest
+
+from datos_sinteticos import generar_filas
+from entrenamiento import CONJUNTOS_FEATURES, entrenar_candidato, preparar_matrices
+from puntuacion import FEATURES, ModeloRiesgo, aplicar_reglas, calcular_percentiles, construir_features
+
+
+@pytest.fixture(scope="module")
+def datos():
+    df = generar_filas(5_000)
+    data = construir_features(df)
+    aplicar_reglas(data, **calcular_percentiles(data))
+    return df, data
+
+
+def test_matrices_por_conjunto(datos, tmp_path):
+    _, data = datos
+    rutas = preparar_matrices(data, directorio=str(tmp_path))
+    assert set(rutas) == set(CONJUNTOS_FEATURES)
+    for nombre, (ruta_escalada, ruta_cruda) in rutas.items():
+        columnas = CONJUNTOS_FEATURES[nombre]
+        escalada = np.load(ruta_escalada, mmap_mode="r")
+        cruda = np.load(ruta_cruda, mmap_mode="r")
+        assert escalada.shape == cruda.shape == (len(data), len(columnas))
+        np.testing.assert_allclose(cruda, data[columnas].to_numpy(dtype=np.float32))
+    # Segunda llamada: mismas rutas, sin reescribir
+    assert preparar_matrices(data, directorio=str(tmp_path)) == rutas
+
+
+def test_candidato_igual_a_modelo_riesgo(datos, tmp_path):
+    df, data = datos
+    rutas = preparar_matrices(data, {"completo": FEATURES}, directorio=str(tmp_path))
+    metricas = entrenar_candidato(rutas["completo"], {"n_estimators": 50}, [42], n_jobs=1)
+
+    puntuado = ModeloRiesgo.entrenar(df, n_estimators=50).puntuar(df)
+    esperado = float((puntuado["riesgo_modelo"] >= 80).mean())
+    assert metricas["proporcion_alto"] == pytest.approx(esperado, abs=2 / len(df))
+
+
+def test_filas_reordenadas_cambian_la_llave(datos, tmp_path):
+    _, data = datos
+    rutas = preparar_matrices(data, directorio=str(tmp_path))
+    invertidas = preparar_matrices(data.iloc[::-1], directorio=str(tmp_path))
+    for nombre in rutas:
+        assert rutas[nombre] != invertidas[nombre]
+        np.testing.assert_array_equal(np.load(invertidas[nombre][1])[0], np.load(rutas[nombre][1])[-1])
@@ -0,0 +1,52 @@
+"""
+Pruebas de las explicaciones de riesgo_modelo: consulta por id (con ids
+repetidos) y cálculo con el modelo que guardó el pipeline.
+
+Para ejecutar (desde la raíz del repositorio):
+pytest -q tests
+"""
+
+import sys
+
+import numpy as np
+
+import explicaciones
+from datos_sinteticos import generar_filas
+from explicaciones import Explicaciones
+from puntuacion import FEATURES, ModeloRiesgo
+
+
+def test_ids_repetidos_no_tienen_explicacion():
+    indices = np.array([[0, 1], [2, 3], [4, 5], [6, 7]], dtype=np.int8)
+    pesos = np.array([[0.6, 0.4], [0.7, 0.3], [0.9, 0.1], [0.5, 0.5]], dtype=np.float16)
+    exp = Explicaciones(np.array(["a", "b", "a", "c"]), indices, pesos, FEATURES)
+
+    # "a" es ambiguo: no se muestra la explicación de otra declaración
+    assert exp.de("a") == []
+    assert [f for f, _ in exp.de("b")] == [FEATURES[2], FEATURES[3]]
+    assert [f for f, _ in exp.de("c")] == [FEATURES[6], FEATURES[7]]
+    assert exp.de("no-existe") == []
+
+
+def test_main_usa_el_modelo_guardado(tmp_path, monkeypatch):
+    df = generar_filas(2_000)
+    modelo = ModeloRiesgo.entrenar(df, n_estimators=20)
+    ruta_modelo = tmp_path / "modelo.joblib"
+    modelo.guardar(ruta_modelo)
+    ruta_csv = tmp_path / "resultados.csv"
+    modelo.puntuar(df).to_csv(ruta_csv, index=False)
+
+    # Un modelo re-entrenado con otros parámetros daría otras explicaciones
+    monkeypatch.setattr(ModeloRiesgo, "entrenar", None)
+    salida = tmp_path / "explicaciones.npz"
+    monkeypatch.setattr(
+        sys, "argv",
+        ["explicaciones.py", "--datos", str(ruta_csv), "--modelo", str(ruta_modelo),
+         "--salida", str(salida), "--n-jobs", "1"],
+    )
+    explicaciones.main()
+
+    esperado = explicaciones.calcular_explicaciones(modelo, modelo.puntuar(df), n_jobs=1)
+    with np.load(salida) as z:
+        np.testing.assert_array_equal(z["indices"], esperado[0])
+        np.testing.assert_array_equal(z["pesos"], esperado[1])
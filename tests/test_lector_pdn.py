@@ -0,0 +1,119 @@
+"""
+Pruebas del lector PDN S1: separador de registros con raw_decode y
+equivalencia entre los motores stdlib e ijson.
+
+Para ejecutar (desde la raíz del repositorio):
+pytest -q tests
+"""
+
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import lector_pdn
+from datos_sinteticos import generar_declaraciones
+from lector_pdn import _iterar_registros, leer_archivos
+
+MOTORES = ["stdlib"] + (["ijson"] if lector_pdn.ijson is not None else [])
+
+# Elementos válidos e inválidos mezclados (índices 1–5 son casos raros)
+REGISTROS_RAROS = [
+    1,
+    None,
+    [],
+    {"declaracion": None},
+    {"id": "sin-situacion", "declaracion": {"situacionPatrimonial": None}},
+]
+
+
+def _escribir(tmp_path, contenido, nombre="datos.json"):
+    ruta = tmp_path / nombre
+    ruta.write_text(contenido, encoding="utf-8")
+    return str(ruta)
+
+
+def _leer(ruta, motor):
+    filas, errores = leer_archivos([ruta], motor=motor)
+    return pd.DataFrame(filas), errores
+
+
+# ============================================
+# SEPARADOR DE REGISTROS (raw_decode)
+# ============================================
+
+
+@pytest.mark.parametrize("tam_bloque", [1, 3, 7, 64, 1 << 20])
+def test_registros_cortados_por_bloque(tam_bloque):
+    datos = [
+        {"a": "texto con ] y , y \\"},
+        [1, 2, {"b": None}],
+        "cadena",
+        12.5,
+        {"anidado": {"x": [{"y": "}"}]}},
+    ]
+    texto = " \n[ " + " ,\n".join(json.dumps(d) for d in datos) + " ]\n"
+    registros = list(_iterar_registros(io.StringIO(texto), tam_bloque=tam_bloque))
+    assert registros == datos
+
+
+@pytest.mark.parametrize("texto", ["[]", "  [ \n ]  "])
+def test_arreglo_vacio(texto):
+    assert list(_iterar_registros(io.StringIO(texto), tam_bloque=2)) == []
+
+
+@pytest.mark.parametrize("texto", ['{"a": 1}', "", "1"])
+def test_nivel_superior_no_arreglo(texto):
+    with pytest.raises(ValueError):
+        list(_iterar_registros(io.StringIO(texto)))
+
+
+def test_falta_coma():
+    with pytest.raises(ValueError):
+        list(_iterar_registros(io.StringIO('[{"a": 1} {"b": 2}]')))
+
+
+# ============================================
+# EQUIVALENCIA ENTRE MOTORES
+# ============================================
+
+
+@pytest.mark.parametrize("motor", MOTORES)
+def test_objeto_en_nivel_superior_es_error(tmp_path, motor):
+    ruta = _escribir(tmp_path, json.dumps({"declaraciones": generar_declaraciones(3)}))
+    filas, errores = _leer(ruta, motor)
+    assert filas.empty
+    assert len(errores) == 1
+    assert errores[0]["tipo"] == "ValueError"
+
+
+@pytest.mark.skipif(lector_pdn.ijson is None, reason="requiere ijson")
+@pytest.mark.parametrize("relleno", [0, 2])
+def test_motores_equivalentes(tmp_path, relleno):
+    declaraciones = generar_declaraciones(40, relleno=relleno)
+    registros = declaraciones[:1] + REGISTROS_RAROS + declaraciones[1:]
+    ruta = _escribir(tmp_path, json.dumps(registros, ensure_ascii=False))
+
+    filas_std, errores_std = _leer(ruta, "stdlib")
+    filas_ijson, errores_ijson = _leer(ruta, "ijson")
+
+    # Los dos dicts con declaracion null / situacionPatrimonial null sí dan fila
+    assert len(filas_std) == len(declaraciones) + 2
+    pd.testing.assert_frame_equal(filas_std, filas_ijson)
+    assert errores_std == errores_ijson
+    assert [e["registro"] for e in errores_std] == [1, 2, 3]
+
+
+@pytest.mark.skipif(lector_pdn.ijson is None, reason="requiere ijson")
+def test_archivo_truncado(tmp_path):
+    texto = json.dumps(generar_declaraciones(10))
+    ruta = _escribir(tmp_path, texto[: len(texto) * 2 // 3])
+
+    filas_std, errores_std = _leer(ruta, "stdlib")
+    filas_ijson, errores_ijson = _leer(ruta, "ijson")
+
+    pd.testing.assert_frame_equal(filas_std, filas_ijson)
+    assert len(errores_std) == len(errores_ijson) == 1
+    # Los dos motores ubican el corte en el mismo registro
+    assert errores_std[0]["registro"] == errores_ijson[0]["registro"] == len(filas_std)
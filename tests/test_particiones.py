@@ -0,0 +1,64 @@
+"""
+Pruebas del dataset particionado: el Top N leído con poda y cabezas de
+partición es el mismo que el de pandas sobre todas las filas.
+
+Para ejecutar (desde la raíz del repositorio):
+pytest -q tests
+"""
+
+import pytest
+
+import particiones
+from datos_sinteticos import generar_filas
+from particiones import exportar_particionado, leer_particiones, leer_top_n, particiones_top_n
+from puntuacion import ModeloRiesgo
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    df = generar_filas(20_000)
+    data = ModeloRiesgo.entrenar(df, n_estimators=50).puntuar(df)
+    directorio = str(tmp_path_factory.mktemp("particiones"))
+    manifiesto = exportar_particionado(data, directorio, num_cubetas=8)
+    return data, directorio, manifiesto
+
+
+FILTROS = {
+    "sin_filtro": None,
+    "sin_alto": lambda d: d["riesgo_nivel"].isin(["Medio", "Bajo"]),
+    "solo_bajo": lambda d: d["riesgo_nivel"] == "Bajo",
+    "rango_ingresos": lambda d: (d["total_ingresos"] >= 1e5) & (d["total_ingresos"] <= 1e6),
+}
+
+
+def test_manifiesto_y_orden(dataset):
+    data, directorio, manifiesto = dataset
+    assert manifiesto["orden"] == "riesgo_modelo"
+    assert sum(p["filas"] for p in manifiesto["particiones"]) == len(data)
+    for p in manifiesto["particiones"][:3]:
+        parte = particiones.leer_particion(directorio, p)
+        assert parte["riesgo_modelo"].is_monotonic_decreasing
+        assert p["top_k"]["riesgo_modelo"] == parte["riesgo_modelo"].iloc[particiones.TOP_K - 1]
+
+
+@pytest.mark.parametrize("n", [10, 50])
+def test_particiones_top_n_conserva_el_top(dataset, n):
+    data, directorio, manifiesto = dataset
+    candidatas = particiones_top_n(manifiesto["particiones"], n, "riesgo_modelo")
+    leidas = leer_particiones(directorio, candidatas)
+    assert sorted(leidas.nlargest(n, "riesgo_modelo")["riesgo_modelo"]) == sorted(
+        data.nlargest(n, "riesgo_modelo")["riesgo_modelo"]
+    )
+
+
+@pytest.mark.parametrize("institucion", [None, "PETRÓLEOS MEXICANOS"])
+@pytest.mark.parametrize("filtro", list(FILTROS))
+@pytest.mark.parametrize("n", [10, 50])
+def test_leer_top_n_igual_a_pandas(dataset, institucion, filtro, n):
+    data, directorio, manifiesto = dataset
+    esperado = data if institucion is None else data[data["institucion"] == institucion]
+    if FILTROS[filtro] is not None:
+        esperado = esperado[FILTROS[filtro](esperado)]
+
+    top = leer_top_n(directorio, manifiesto, n, "riesgo_modelo", institucion=institucion, filtro=FILTROS[filtro])
+    assert list(top["riesgo_modelo"]) == list(esperado.nlargest(n, "riesgo_modelo")["riesgo_modelo"])
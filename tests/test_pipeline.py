@@ -0,0 +1,107 @@
+"""
+Pruebas de la caché de etapas del pipeline: aciertos en la segunda corrida
+y re-ejecución de las etapas que escriben archivos cuando su salida falta o
+fue escrita con otra llave.
+
+Para ejecutar (desde la raíz del repositorio):
+pytest -q tests
+"""
+
+import json
+
+import pytest
+
+import pipeline
+from datos_sinteticos import generar_declaraciones
+
+
+@pytest.fixture
+def entorno(tmp_path):
+    (tmp_path / "pdn").mkdir()
+    for i in range(3):
+        declaraciones = generar_declaraciones(200, semilla=i)
+        (tmp_path / "pdn" / f"datos_{i}.json").write_text(json.dumps(declaraciones), encoding="utf-8")
+
+    rutas = {
+        "csv": tmp_path / "resultados.csv",
+        "modelo": tmp_path / "modelo.joblib",
+        "particiones": tmp_path / "particiones",
+        "explicaciones": tmp_path / "explicaciones.npz",
+    }
+
+    def correr():
+        metadatos = pipeline.ejecutar(
+            str(tmp_path / "pdn" / "*.json"),
+            porcentaje=1.0,
+            salida_csv=str(rutas["csv"]),
+            ruta_modelo=str(rutas["modelo"]),
+            dir_particiones=str(rutas["particiones"]),
+            ruta_explicaciones=str(rutas["explicaciones"]),
+            ruta_metadatos=str(tmp_path / "metadatos.json"),
+            directorio_cache=str(tmp_path / "cache"),
+            parametros_modelo={"n_estimators": 20},
+        )
+        return {e["etapa"]: e["cache"] for e in metadatos["ejecucion"]["etapas"]}
+
+    return correr, rutas
+
+
+def test_segunda_corrida_es_acierto(entorno):
+    correr, _ = entorno
+    primera = correr()
+    assert primera["exportar"] == primera["explicaciones"] == "fallo"
+    segunda = correr()
+    for etapa in ["ingesta", "features", "reglas", "modelo", "exportar", "explicaciones"]:
+        assert segunda[etapa] == "acierto"
+
+
+def test_salida_faltante_se_regenera(entorno):
+    correr, rutas = entorno
+    correr()
+    rutas["csv"].unlink()
+    etapas = correr()
+    assert etapas["exportar"] == "fallo"
+    assert etapas["explicaciones"] == "acierto"
+    assert rutas["csv"].exists()
+
+
+def test_salida_de_otra_llave_se_regenera(entorno):
+    correr, rutas = entorno
+    correr()
+    # Explicaciones escritas por otra corrida (p. ej. otro modelo)
+    rutas["explicaciones"].with_name("explicaciones.npz.clave").write_text("otra\n", encoding="utf-8")
+    etapas = correr()
+    assert etapas["explicaciones"] == "fallo"
+    assert etapas["exportar"] == "acierto"
+    assert correr()["explicaciones"] == "acierto"
+
+
+def test_llave_incluye_codigo_de_modulos(monkeypatch, tmp_path):
+    cache = pipeline.PipelineCache(str(tmp_path))
+    claves = []
+    for codigo in ["UMBRAL = 1", "UMBRAL = 2"]:
+        # Sólo cambia el código del módulo, no el de la etapa
+        monkeypatch.setattr(
+            pipeline, "_codigo", lambda objeto, c=codigo: c if objeto is pipeline.puntuacion else "etapa"
+        )
+        _, clave = cache.etapa("reglas", lambda: 0, modulos=[pipeline.puntuacion], cache=False)
+        claves.append(clave)
+    assert claves[0] != claves[1]
+
+
+def test_cache_conserva_solo_la_ultima_llave(entorno, tmp_path, monkeypatch):
+    correr, _ = entorno
+    correr()
+    cache = tmp_path / "cache"
+    antes = sorted(p.name for p in cache.glob("*.pkl"))
+
+    # Otra llave para reglas y las etapas que dependen de ella
+    monkeypatch.setattr(pipeline, "UMBRALES_REGLAS", {**pipeline.UMBRALES_REGLAS, "prop_alta": 0.6})
+    correr()
+
+    despues = sorted(p.name for p in cache.glob("*.pkl"))
+    assert len(despues) == len(antes)
+    for etapa in ["ingesta", "features", "reglas", "modelo", "exportar", "explicaciones"]:
+        assert len(list(cache.glob(f"{etapa}-*.pkl"))) == 1
+    assert [n for n in despues if n.startswith("ingesta-")] == [n for n in antes if n.startswith("ingesta-")]
+    assert [n for n in despues if n.startswith("reglas-")] != [n for n in antes if n.startswith("reglas-")]
@@ -0,0 +1,108 @@
+"""
+Pruebas del servicio de puntuación: micro-lotes con peticiones
+concurrentes y respuestas HTTP para cuerpos válidos e inválidos.
+
+Para ejecutar (desde la raíz del repositorio):
+pytest -q tests
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from datos_sinteticos import generar_declaraciones, generar_filas
+from puntuacion import ModeloRiesgo
+from servicio_riesgo import ServidorRiesgo
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    return ModeloRiesgo.entrenar(generar_filas(2_000), n_estimators=20)
+
+
+@pytest.fixture(scope="module")
+def servidor(modelo):
+    # Ventana amplia para que las peticiones concurrentes compartan lote
+    servidor = ServidorRiesgo(("127.0.0.1", 0), modelo, espera_ms=50)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _post(servidor, cuerpo):
+    """(código, respuesta JSON) de POST /puntuar; cuerpo str se manda tal cual."""
+    datos = cuerpo if isinstance(cuerpo, str) else json.dumps(cuerpo)
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/puntuar"
+    peticion = urllib.request.Request(url, data=datos.encode("utf-8"), method="POST")
+    try:
+        with urllib.request.urlopen(peticion, timeout=30) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_peticiones_concurrentes_reciben_sus_filas(servidor, modelo):
+    filas = generar_filas(64, semilla=7)
+    filas["id"] = [f"decl-{i}" for i in range(len(filas))]
+    esperado = modelo.puntuar(filas).set_index("id")["riesgo_modelo"]
+
+    grupos = [filas.iloc[i:i + 4] for i in range(0, len(filas), 4)]
+    lotes_inicio = servidor.micro_lotes.lotes
+    with ThreadPoolExecutor(len(grupos)) as pool:
+        respuestas = list(pool.map(
+            lambda g: _post(servidor, {"filas": json.loads(g.to_json(orient="records"))}), grupos
+        ))
+
+    for grupo, (codigo, respuesta) in zip(grupos, respuestas):
+        assert codigo == 200
+        resultados = respuesta["resultados"]
+        assert [r["id"] for r in resultados] == list(grupo["id"])
+        for r in resultados:
+            assert r["riesgo_modelo"] == pytest.approx(esperado[r["id"]])
+    assert servidor.micro_lotes.lotes - lotes_inicio < len(grupos)
+
+
+def test_declaraciones_pdn(servidor):
+    declaraciones = generar_declaraciones(5)
+    codigo, respuesta = _post(servidor, {"declaraciones": declaraciones})
+    assert codigo == 200
+    assert [r["id"] for r in respuesta["resultados"]] == [d["id"] for d in declaraciones]
+
+
+@pytest.mark.parametrize(
+    "cuerpo",
+    [
+        {"declaraciones": [1]},
+        {"declaraciones": [{"declaracion": None}, "texto"]},
+        {"declaraciones": {"id": "x"}},
+        {"filas": [1, 2]},
+        {"filas": "x"},
+        {"otra": []},
+        "42",
+        "null",
+        "{no es json",
+    ],
+)
+def test_cuerpo_invalido_es_400(servidor, cuerpo):
+    codigo, respuesta = _post(servidor, cuerpo)
+    assert codigo == 400
+    assert "error" in respuesta
+
+
+@pytest.mark.parametrize("cuerpo", [{"filas": [{}]}, {"declaraciones": [{}]}, [{}]])
+def test_fila_sin_columnas_se_puntua(servidor, cuerpo):
+    codigo, respuesta = _post(servidor, cuerpo)
+    assert codigo == 200
+    assert len(respuesta["resultados"]) == 1
+    assert respuesta["resultados"][0]["riesgo_nivel"] in {"Bajo", "Medio", "Alto"}
+
+
+@pytest.mark.parametrize("cuerpo", [{"filas": []}, []])
+def test_sin_filas(servidor, cuerpo):
+    assert _post(servidor, cuerpo) == (200, {"resultados": []})
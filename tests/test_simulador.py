@@ -0,0 +1,113 @@
+"""
+Pruebas del simulador de umbrales: percentiles y conteos por nivel con
+searchsorted iguales a pandas (quantile, pd.cut) y a aplicar_reglas, y
+arreglos guardados junto al dataset particionado.
+
+Para ejecutar (desde la raíz del repositorio):
+pytest -q tests
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datos_sinteticos import generar_filas
+from particiones import exportar_particionado
+from puntuacion import (
+    ETIQUETAS_NIVEL,
+    LISTA_REGLAS,
+    UMBRALES_REGLAS,
+    ModeloRiesgo,
+    aplicar_reglas,
+    calcular_percentiles,
+    nivel_riesgo,
+)
+from simulador import SimuladorUmbrales, _percentil_ordenado
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = generar_filas(5_000)
+    data = ModeloRiesgo.entrenar(df, n_estimators=30).puntuar(df)
+    # Instituciones y scores nulos, como en los archivos PDN reales
+    data.loc[data.index[::37], "institucion"] = None
+    data.loc[data.index[::101], "riesgo_modelo"] = np.nan
+    return data
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 1000])
+@pytest.mark.parametrize("q", [0.0, 0.1, 0.5, 0.9, 0.99, 1.0])
+def test_percentil_ordenado_igual_a_pandas(n, q):
+    x = np.random.default_rng(n).lognormal(10, 2, n)
+    assert _percentil_ordenado(np.sort(x), q) == pytest.approx(pd.Series(x).quantile(q))
+
+
+def test_percentil_ordenado_vacio():
+    assert np.isnan(_percentil_ordenado(np.array([]), 0.9))
+
+
+def _niveles_referencia(riesgo, corte_medio, corte_alto):
+    """Bajo [0, medio), Medio [medio, alto), Alto [alto, 101); como pd.cut con right=False."""
+    if (corte_medio, corte_alto) == (50, 80):
+        return pd.cut(riesgo, bins=[0, 50, 80, 101], labels=ETIQUETAS_NIVEL, right=False)
+    # pd.cut no acepta cortes repetidos (p. ej. 0 o medio == alto)
+    nivel = np.select(
+        [riesgo < corte_medio, riesgo < corte_alto, riesgo < 101], ETIQUETAS_NIVEL, default=None
+    )
+    return pd.Series(nivel, index=riesgo.index).where(riesgo.notna() & (riesgo >= 0))
+
+
+@pytest.mark.parametrize("cortes", [(50, 80), (40, 75), (0, 100), (30, 30)])
+def test_niveles_igual_a_pd_cut(data, cortes):
+    simulador = SimuladorUmbrales(data)
+    niveles_pd = _niveles_referencia(data["riesgo_modelo"], *cortes)
+
+    globales, por_institucion = simulador.niveles(*cortes)
+    conteos = niveles_pd.value_counts()
+    assert globales == {n: int(conteos.get(n, 0)) for n in ETIQUETAS_NIVEL}
+
+    esperado = (
+        pd.crosstab(data["institucion"].fillna("Sin institución"), niveles_pd)
+        .reindex(columns=ETIQUETAS_NIVEL, fill_value=0)
+    )
+    obtenido = por_institucion.loc[esperado.index]
+    pd.testing.assert_frame_equal(obtenido, esperado, check_names=False, check_dtype=False)
+
+
+def test_base_igual_a_banderas_guardadas(data):
+    base = SimuladorUmbrales(data).simular()
+    for regla in LISTA_REGLAS:
+        assert base["activaciones"][regla] == int(data[regla].sum())
+    conteos = data["score_reglas"].value_counts()
+    assert base["distribucion_score_reglas"].tolist() == [
+        int(conteos.get(i, 0)) for i in range(len(LISTA_REGLAS) + 1)
+    ]
+    niveles = nivel_riesgo(data["riesgo_modelo"]).value_counts()
+    assert base["niveles"] == {n: int(niveles.get(n, 0)) for n in ETIQUETAS_NIVEL}
+
+
+def test_umbrales_distintos_igual_a_aplicar_reglas(data):
+    umbrales = {**UMBRALES_REGLAS, "prop_alta": 0.3, "percentil_alto_ingreso": 0.75, "ratio_deuda": 1}
+    resultado = SimuladorUmbrales(data).reglas(umbrales)
+
+    esperado = data.copy()
+    percentiles = calcular_percentiles(esperado, umbrales)
+    aplicar_reglas(esperado, **percentiles, umbrales=umbrales)
+    assert resultado["p90_ingreso"] == pytest.approx(percentiles["p90_ingreso"])
+    for regla in LISTA_REGLAS:
+        assert resultado["activaciones"][regla] == int(esperado[regla].sum())
+
+
+def test_arreglos_del_dataset_particionado(data, tmp_path):
+    manifiesto = exportar_particionado(data, str(tmp_path), num_cubetas=4)
+    cargado = SimuladorUmbrales.cargar(os.path.join(str(tmp_path), manifiesto["simulador"]))
+    original = SimuladorUmbrales(data)
+
+    umbrales = {"prop_alta": 0.4, "percentil_outlier": 0.95}
+    a, b = original.simular(umbrales, 45, 70), cargado.simular(umbrales, 45, 70)
+    assert a["activaciones"] == b["activaciones"]
+    assert a["niveles"] == b["niveles"]
+    np.testing.assert_array_equal(a["distribucion_score_reglas"], b["distribucion_score_reglas"])
+    pd.testing.assert_frame_equal(a["por_institucion"], b["por_institucion"], check_index_type=False)